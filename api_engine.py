@@ -0,0 +1,363 @@
+# api_engine.py — 화면(DOM)을 거치지 않고 지니티처 API를 직접 호출하는 업로드 엔진 + 요청 캡처/재생 도구
+#
+# 사이트의 API 주소는 공개돼 있지 않으므로, 먼저 브라우저 엔진을 캡처 모드(--capture)로 한 번 돌려
+# CAPTURE_PATH에 실제 요청/응답을 기록하고, 그걸 보고 ENDPOINTS_PATH(geni_api.json)를 채운다.
+# geni_api.json이 없거나 API 호출이 실패하면 uploader.run()이 브라우저 엔진으로 넘어간다.
+# 비동기 Playwright라 uploader의 비동기 코어가 띄워 둔 드라이버(AsyncUploader.driver())를 그대로 쓴다.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus, urlsplit
+from pathlib import Path
+from datetime import datetime
+import asyncio, base64, json, mimetypes, os, re, sys, threading, time
+
+# ===================== 설정 =====================
+API_BASE = "https://www.geniteacher.com"
+CAPTURE_PATH = "captured_requests.jsonl"  # 캡처 모드에서 기록하는 네트워크 호출(JSONL)
+ENDPOINTS_PATH = "geni_api.json"  # 캡처를 보고 채우는 엔드포인트 정의
+TOKEN_KEY = "__OTL_Authentication_Token__"  # localStorage의 인증 토큰 키
+OCR_POLL_SEC = 2.0  # OCR 상태 조회 간격(초) — 요청 하나라 화면 폴링보다 훨씬 가볍다
+CAPTURE_BODY_LIMIT = 20000  # 캡처에 남기는 응답 본문 최대 길이
+SECRET_HEADERS = {"cookie", "authorization", "x-auth-token", "set-cookie"}
+JWT_REGEX = re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]*")
+SECRET_FIELD_REGEX = re.compile(r"pass|pwd|token|secret|auth|session|credential", re.I)  # 본문에서 가리는 필드 이름
+
+# geni_api.json 예시 — path의 {id}는 create 응답에서 꺼낸 문서 id로 채워진다.
+EXAMPLE_ENDPOINTS = {
+    "token_header": "Authorization",
+    "token_format": "Bearer {token}",
+    "id_field": "id",
+    "create": {"method": "POST", "path": "/api/test-paper"},
+    "upload": {"method": "POST", "path": "/api/test-paper/{id}/files",
+               "problem_field": "problemFile", "answer_field": "answerFile"},
+    "ocr_status": {"method": "GET", "path": "/api/test-paper/{id}/ocr-status",
+                   "state_field": "status", "done": ["DONE", "COMPLETE", "COMPLETED", "SUCCESS"],
+                   "failed": ["FAIL", "FAILED", "ERROR"]},
+    "save": {"method": "POST", "path": "/api/test-paper/{id}/save"},
+    "categories": {"method": "GET", "path": "/api/categories", "tree_field": "data"},  # 선택 항목
+}
+
+# ===================== 엔드포인트 정의 =====================
+def load_endpoints(path=None):
+    """geni_api.json을 읽음. 없으면 None(= API 엔진 사용 불가, 브라우저 엔진으로)."""
+    path = path or ENDPOINTS_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        eps = json.load(f)
+    missing = [k for k in ("create", "upload", "ocr_status", "save") if k not in eps]
+    if missing:
+        raise RuntimeError(f"{path}에 엔드포인트가 빠져 있습니다: {', '.join(missing)}")
+    return eps
+
+def token_from_storage(storage_path):
+    """geni_storage.json(Playwright storage_state)에서 인증 토큰을 꺼냄."""
+    if not os.path.exists(storage_path):
+        return None
+    with open(storage_path, encoding="utf-8") as f:
+        return token_from_state(json.load(f))
+
+def token_from_state(state):
+    """storage_state(dict)의 localStorage에서 인증 토큰(TOKEN_KEY)을 꺼냄. 없으면 None."""
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if item.get("name") == TOKEN_KEY:
+                return item.get("value")
+    return None
+
+def token_expiry(token):
+    """토큰이 JWT이고 exp가 있으면 그 만료 시각(epoch), 아니면 None."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except Exception:
+        return None
+
+def auth_headers(endpoints, token):
+    """토큰을 실어 보낼 헤더(geni_api.json의 token_header/token_format)."""
+    if not token:
+        return {}
+    fmt = endpoints.get("token_format", "Bearer {token}")
+    return {endpoints.get("token_header", "Authorization"): fmt.format(token=token)}
+
+def _dig(data, field):
+    """'a.b.c' 형태의 필드를 꺼냄. 최상위에 없으면 data 아래에서도 찾는다."""
+    for root in (data, data.get("data") if isinstance(data, dict) else None):
+        cur = root
+        for key in field.split("."):
+            if not isinstance(cur, dict) or key not in cur:
+                cur = None
+                break
+            cur = cur[key]
+        if cur is not None:
+            return cur
+    return None
+
+# ===================== API 엔진 =====================
+class ApiUploader:
+    """
+    APIRequestContext로 생성 → 파일 업로드 → OCR 상태 조회 → 저장을 직접 호출.
+    쿠키는 storage_state로, 토큰은 localStorage 값을 헤더로 실어 보낸다.
+    """
+
+    def __init__(self, request, endpoints, base_url):
+        self.request, self.eps, self.base_url = request, endpoints, base_url
+
+    @classmethod
+    async def open(cls, playwright, endpoints, storage_path, base_url=None):
+        """playwright: async_playwright()로 띄운 드라이버(새 프로세스를 띄우지 않고 요청 컨텍스트만 만든다)."""
+        base_url = base_url or API_BASE
+        request = await playwright.request.new_context(
+            base_url=base_url,
+            storage_state=storage_path if os.path.exists(storage_path) else None,
+            extra_http_headers=auth_headers(endpoints, token_from_storage(storage_path)),
+        )
+        return cls(request, endpoints, base_url)
+
+    async def close(self):
+        await self.request.dispose()
+
+    async def _call(self, name, doc_id=None, **kwargs):
+        ep = self.eps[name]
+        path = ep["path"].format(id=doc_id)
+        resp = await self.request.fetch(path, method=ep.get("method", "GET"), **kwargs)
+        if not resp.ok:
+            raise RuntimeError(f"API {name} 실패: HTTP {resp.status} {path}")
+        try:
+            return await resp.json()
+        except Exception:
+            return {}
+
+    async def upload(self, base, problem_file: Path, answer_file: Path, categories,
+               ocr_timeout_ms, log=print, on_phase=None):
+        """세트 하나를 API로 업로드. 단계마다 on_phase(phase, url) 호출. 문서 id 반환."""
+        on_phase = on_phase or (lambda phase, url: None)
+        created = await self._call("create", data={"name": base, "categories": list(categories)})
+        doc_id = _dig(created, self.eps.get("id_field", "id"))
+        if doc_id is None:
+            raise RuntimeError("API create 응답에서 문서 id를 찾지 못했습니다.")
+
+        up = self.eps["upload"]
+        await self._call("upload", doc_id, multipart={
+            up.get("problem_field", "problemFile"): _file_part(problem_file),
+            up.get("answer_field", "answerFile"): _file_part(answer_file),
+        })
+        on_phase("submitted", f"{self.base_url}/test-paper-upsert?id={doc_id}")
+        log(f"[*] {base} : (API) 업로드 완료, OCR 상태 확인 중... (id={doc_id})")
+
+        st = self.eps["ocr_status"]
+        done = {s.upper() for s in st.get("done", ["DONE", "COMPLETE", "COMPLETED", "SUCCESS"])}
+        failed = {s.upper() for s in st.get("failed", ["FAIL", "FAILED", "ERROR"])}
+        start = time.time()
+        while True:
+            state = str(_dig(await self._call("ocr_status", doc_id), st.get("state_field", "status")) or "").upper()
+            if state in done:
+                break
+            if state in failed:
+                raise RuntimeError(f"API OCR 실패 상태: {state}")
+            if (time.time() - start) * 1000 > ocr_timeout_ms:
+                raise TimeoutError("OCR 작업이 제한 시간 내에 끝나지 않았습니다.")
+            await asyncio.sleep(OCR_POLL_SEC)
+        on_phase("ocr_done", f"{self.base_url}/test-paper-upsert?id={doc_id}")
+
+        await self._call("save", doc_id, data={})
+        on_phase("saved", f"{self.base_url}/test-paper-upsert?id={doc_id}")
+        log(f"[✓] {base} : (API) 저장 완료.")
+        return doc_id
+
+def normalize_tree(tree):
+    """카테고리 트리를 {이름: {하위...}} 형태로. [{name, children}] 목록 형태도 받아 준다."""
+    if isinstance(tree, dict):
+        return {str(k): normalize_tree(v) for k, v in tree.items()}
+    if isinstance(tree, list):
+        out = {}
+        for node in tree:
+            if isinstance(node, dict):
+                name = node.get("name") or node.get("label") or node.get("title")
+                if name:
+                    out[str(name)] = normalize_tree(node.get("children") or [])
+            elif isinstance(node, str):
+                out[node] = {}
+        return out
+    return {}
+
+async def fetch_categories(playwright, endpoints, storage_path, base_url=None):
+    """geni_api.json에 categories 엔드포인트가 있으면 전체 카테고리 트리를 한 번에 받아 옴. 없으면 None."""
+    ep = endpoints.get("categories")
+    if not ep:
+        return None
+    api = await ApiUploader.open(playwright, endpoints, storage_path, base_url=base_url)
+    try:
+        data = await api._call("categories")
+    finally:
+        await api.close()
+    tree = _dig(data, ep.get("tree_field", "data"))
+    return normalize_tree(tree if tree is not None else data)
+
+def _file_part(path: Path):
+    return {
+        "name": path.name,
+        "mimeType": mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        "buffer": path.read_bytes(),
+    }
+
+# ===================== 캡처(브라우저 엔진의 네트워크 호출 기록) =====================
+def _safe_headers(headers):
+    return {k: ("<redacted>" if k.lower() in SECRET_HEADERS else v) for k, v in headers.items()}
+
+def _redact_json(data):
+    if isinstance(data, dict):
+        return {k: ("<redacted>" if SECRET_FIELD_REGEX.search(k) and not isinstance(v, (dict, list))
+                    else _redact_json(v)) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_redact_json(v) for v in data]
+    if isinstance(data, str) and JWT_REGEX.fullmatch(data):  # 이름과 상관없이 토큰처럼 생긴 값
+        return "<redacted>"
+    return data
+
+def _safe_body(text):
+    """
+    요청/응답 본문에서 비밀번호·토큰 같은 필드 값을 가림(JSON, 폼). 어느 형식도 아닌데
+    그런 이름이 보이면 본문 전체를 가린다. 가린 뒤에 CAPTURE_BODY_LIMIT로 자른다.
+    """
+    if not text:
+        return text
+    try:
+        return json.dumps(_redact_json(json.loads(text)), ensure_ascii=False)[:CAPTURE_BODY_LIMIT]
+    except ValueError:
+        pass
+    if re.fullmatch(r"[^=&\s]+=[^&\s]*(?:&[^=&\s]+=[^&\s]*)*", text):
+        pairs = [kv.split("=", 1) for kv in text.split("&")]
+        return "&".join(f"{k}={'<redacted>' if SECRET_FIELD_REGEX.search(unquote_plus(k)) else v}"
+                        for k, v in pairs)[:CAPTURE_BODY_LIMIT]
+    if SECRET_FIELD_REGEX.search(text):
+        return f"<redacted {len(text)} chars>"
+    return text[:CAPTURE_BODY_LIMIT]
+
+def start_capture(context, path=CAPTURE_PATH):
+    """
+    컨텍스트의 XHR/fetch 요청·응답을 JSONL로 기록. 인증 헤더와 본문의 비밀번호/토큰 값은 가리고
+    파일 본문은 크기만 남긴다.
+    uploader의 async 컨텍스트에 붙인다(응답은 이벤트 루프 스레드에서 차례로 기록).
+    """
+
+    def record(resp, resp_body):
+        req = resp.request
+        ctype = req.headers.get("content-type", "")
+        body = None
+        try:
+            if "multipart" in ctype:
+                body = f"<multipart {len(req.post_data_buffer or b'')} bytes>"
+            else:
+                body = _safe_body(req.post_data)
+        except Exception:
+            pass
+        rec = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "method": req.method, "url": req.url,
+            "request_headers": _safe_headers(req.headers), "request_body": body,
+            "status": resp.status, "response_headers": _safe_headers(resp.headers),
+            "response_body": _safe_body(resp_body),
+        }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    async def on_response(resp):
+        if resp.request.resource_type not in ("xhr", "fetch"):
+            return
+        try:
+            resp_body = await resp.text()
+        except Exception:
+            resp_body = None
+        record(resp, resp_body)
+
+    context.on("response", on_response)
+    print(f"[*] 캡처 모드: XHR/fetch 호출을 {path}에 기록합니다.")
+
+# ===================== 재생용 로컬 대역 서버 =====================
+def load_capture(path=CAPTURE_PATH):
+    """캡처 파일을 (메서드, 경로) → 응답 목록으로 묶음. 같은 호출이 여러 번이면 기록 순서대로 재생."""
+    routes = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            key = (rec["method"], urlsplit(rec["url"]).path)
+            routes.setdefault(key, []).append(rec)
+    return routes
+
+def _route_key(routes, method, path):
+    """정확히 같은 경로가 없으면 숫자 id 부분을 무시하고 비교."""
+    if (method, path) in routes:
+        return (method, path)
+    norm = re.sub(r"/\d+(?=/|$)", "/{id}", path)
+    for m, p in routes:
+        if m == method and re.sub(r"/\d+(?=/|$)", "/{id}", p) == norm:
+            return (m, p)
+    return None
+
+def serve_capture(path=CAPTURE_PATH, port=0):
+    """캡처한 응답을 그대로 돌려주는 로컬 서버를 백그라운드 스레드로 띄움. (server, base_url) 반환."""
+    routes = load_capture(path)
+    served = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            key = _route_key(routes, self.command, urlsplit(self.path).path)
+            if key is None:
+                self.send_response(404); self.end_headers(); return
+            recs = routes[key]
+            n = served.get(key, 0)
+            rec = recs[min(n, len(recs) - 1)]
+            served[key] = n + 1
+            body = (rec.get("response_body") or "").encode("utf-8")
+            self.send_response(rec.get("status", 200))
+            ctype = rec.get("response_headers", {}).get("content-type", "application/json")
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+async def _replay(eps, base_url, problem_file, answer_file):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        api = await ApiUploader.open(p, eps, storage_path="", base_url=base_url)
+        try:
+            return await api.upload(Path(problem_file).stem, Path(problem_file), Path(answer_file),
+                                    [], ocr_timeout_ms=60000)
+        finally:
+            await api.close()
+
+def replay(capture_path, problem_file, answer_file, endpoints_path=ENDPOINTS_PATH):
+    """캡처 + geni_api.json 조합을 로컬 대역 서버에 대고 끝까지 돌려 보는 점검용 실행."""
+    eps = load_endpoints(endpoints_path)
+    if eps is None:
+        raise RuntimeError(f"{endpoints_path}가 없습니다. 예시: {json.dumps(EXAMPLE_ENDPOINTS, ensure_ascii=False)}")
+    server, base_url = serve_capture(capture_path)
+    try:
+        doc_id = asyncio.run(_replay(eps, base_url, problem_file, answer_file))
+        print(f"[✓] 재생 성공 (id={doc_id})")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    # 사용법: python api_engine.py replay captured_requests.jsonl 문제.pdf 해설.pdf
+    if len(sys.argv) == 5 and sys.argv[1] == "replay":
+        replay(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        print("사용법: python api_engine.py replay <캡처.jsonl> <문제파일> <해설파일>")
@@ -1,14 +1,20 @@
 # app_gui.py — Geniteacher Uploader GUI (uploader.py는 수정 없이 그대로 사용)
-import os, sys, threading, queue
+import time
+_T0 = time.perf_counter()  # 시작 시간 측정 기준(가능한 한 먼저)
+
+import asyncio, json, multiprocessing, os, sys, threading, queue
 from pathlib import Path
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 
-import uploader  # ← 같은 폴더의 uploader.py 그대로 사용
+import uploader  # ← 같은 폴더의 uploader.py 그대로 사용(playwright는 브라우저 스레드에서 불러옴)
 
 # ------- 로그 리다이렉트 -------
+LOG_MAX_LINES = 2000  # 로그 창에 남겨 두는 최근 줄 수(전체 로그는 파일로)
+LOG_DIR = "logs"
 log_q = queue.Queue()
+_log_file = {"fp": None, "path": None}
 
 class TextRedirector:
     def __init__(self, text_widget):
@@ -19,41 +25,240 @@ class TextRedirector:
     def flush(self):
         pass
 
+def open_log_file():
+    """이번 GUI 실행의 전체 로그 파일(logs/upload_날짜-시각.log)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    path = os.path.join(LOG_DIR, f"upload_{datetime.now():%Y%m%d-%H%M%S}.log")
+    _log_file.update(fp=open(path, "a", encoding="utf-8"), path=path)
+    return path
+
 def pump_logs(text_widget):
+    """쌓인 메시지를 틱마다 한 번에 처리: 파일에는 전부, 로그 창에는 최근 LOG_MAX_LINES줄만."""
+    chunks = []
     try:
         while True:
-            msg = log_q.get_nowait()
-            text_widget.insert(tk.END, msg)
-            text_widget.see(tk.END)
+            chunks.append(log_q.get_nowait())
     except queue.Empty:
         pass
+    if chunks:
+        batch = "".join(chunks)
+        if _log_file["fp"]:
+            _log_file["fp"].write(batch)
+            _log_file["fp"].flush()
+        if batch.count("\n") > LOG_MAX_LINES:
+            batch = "\n".join(batch.split("\n")[-(LOG_MAX_LINES + 1):])
+        follow = text_widget.yview()[1] >= 0.999  # 위로 스크롤해 보고 있으면 끌어내리지 않음
+        text_widget.insert(tk.END, batch)
+        lines = int(text_widget.index("end-1c").split(".")[0])
+        if lines > LOG_MAX_LINES:
+            text_widget.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
+        if follow:
+            text_widget.see(tk.END)
     text_widget.after(100, pump_logs, text_widget)
 
-# ------- 업로더 실행(별도 스레드) -------
-def run_uploader(folder_path, user, pw, run_btn):
+# ------- 진행 상황(업로더 이벤트 기반, 출력 문구는 파싱하지 않음) -------
+event_q = queue.Queue()
+uploader.add_event_listener(event_q.put)  # 업로드 스레드에서 호출되므로 큐로 넘김
+
+PHASE_NAMES = {
+    "session_check": "세션 확인", "login": "로그인", "reach_create_page": "문제 생성 페이지",
+    "name_input": "학습지명 입력", "categories": "카테고리 선택", "file_transfer": "파일 업로드",
+    "next_click": "[다음] 클릭", "ocr_wait": "OCR 대기", "save_delay": "저장 전 대기",
+    "click_save": "저장", "api_upload": "API 업로드",
+}
+
+def _fmt_sec(sec):
+    sec = int(sec)
+    if sec >= 3600:
+        return f"{sec // 3600}시간 {sec % 3600 // 60}분"
+    return f"{sec // 60}분 {sec % 60}초" if sec >= 60 else f"{sec}초"
+
+class ProgressView:
+    """현재 세트/단계/OCR 경과/완료·실패/남은 시간. 동시 작업이면 진행 중인 세트를 모두 보여 준다."""
+
+    ROWS = [("current", "현재 세트"), ("phase", "단계"), ("ocr", "OCR 경과"),
+            ("counts", "완료/실패"), ("eta", "남은 시간")]
+
+    def __init__(self, parent):
+        self.frame = tk.LabelFrame(parent, text="진행 상황", padx=8, pady=4)
+        self.vars = {}
+        for r, (key, label) in enumerate(self.ROWS):
+            self.vars[key] = tk.StringVar(master=parent, value="-")
+            tk.Label(self.frame, text=label, width=9, anchor="w").grid(row=r, column=0, sticky="w")
+            tk.Label(self.frame, textvariable=self.vars[key], anchor="w").grid(row=r, column=1, sticky="w")
+        self.bar = ttk.Progressbar(self.frame, mode="determinate", maximum=100)
+        self.bar.grid(row=len(self.ROWS), column=0, columnspan=2, sticky="we", pady=(4, 0))
+        self.frame.columnconfigure(1, weight=1)
+        self.reset()
+
+    def reset(self):
+        self.active = {}  # 작업 id(폴더/세트) → {"set", "phase", "ocr_since"}
+        self.total = self.done = self.failed = self.retries = self.quarantined = 0
+        self.first_start = None
+
+    def handle(self, ev):
+        kind, state, base = ev.get("type"), ev.get("state"), ev.get("set")
+        key = ev.get("job") or base  # 다른 폴더의 같은 세트 이름이 섞이지 않도록 작업 id로
+        if kind == "run" and state == "start":
+            self.reset()
+        elif kind == "set":
+            self.total = max(self.total, ev.get("total") or 0)
+            if state == "start":
+                self.first_start = self.first_start or ev["ts"]
+                self.active[key] = {"set": base, "phase": None, "ocr_since": None}
+            elif state == "done":
+                self.active.pop(key, None); self.done += 1
+            elif state == "failed":
+                self.active.pop(key, None); self.failed += 1
+            elif state == "cancelled":
+                self.active.pop(key, None)
+            elif state == "retry":
+                self.retries += 1
+            elif state == "quarantined":
+                self.quarantined += 1
+        elif kind == "phase_start" and key in self.active:
+            self.active[key]["phase"] = ev["phase"]
+            if ev["phase"] == "ocr_wait":
+                self.active[key]["ocr_since"] = ev["ts"]
+        elif kind == "phase" and ev["phase"] == "ocr_wait" and key in self.active:
+            self.active[key]["ocr_since"] = None
+
+    def refresh(self, now):
+        act = self.active
+        self.vars["current"].set(" / ".join(a["set"] for a in act.values()) or "-")
+        self.vars["phase"].set(" / ".join(PHASE_NAMES.get(a["phase"], a["phase"] or "시작") for a in act.values()) or "-")
+        ocr = [_fmt_sec(now - a["ocr_since"]) for a in act.values() if a["ocr_since"]]
+        self.vars["ocr"].set(" / ".join(ocr) or "-")
+        finished = self.done + self.quarantined
+        self.vars["counts"].set(f"완료 {self.done} / 전체 {self.total} · 실패 {self.failed}회"
+                                f"(재시도 {self.retries}) · 격리 {self.quarantined}")
+        if self.done and self.total > finished:
+            self.vars["eta"].set(f"약 {_fmt_sec((now - self.first_start) / self.done * (self.total - finished))}")
+        else:
+            self.vars["eta"].set("-")
+        self.bar["value"] = finished / self.total * 100 if self.total else 0
+
+def pump_events(view, startup_var):
     try:
-        run_btn.config(state=tk.DISABLED)
+        while True:
+            ev = event_q.get_nowait()
+            if ev.get("type") == "startup":
+                startup_var.set(ev["text"])
+            else:
+                view.handle(ev)
+    except queue.Empty:
+        pass
+    view.refresh(time.time())  # 이벤트가 없어도 OCR 경과/남은 시간은 갱신
+    view.frame.after(500, pump_events, view, startup_var)
+
+# ------- 시작 시간 측정(실행 파일 회귀 추적용) -------
+STARTUP_LOG = os.path.join(LOG_DIR, "startup_timing.jsonl")
+STARTUP_NAMES = [("window", "창 표시"), ("playwright_import", "Playwright 불러오기"),
+                 ("driver_start", "드라이버 시작"), ("browser_launch", "브라우저 실행"),
+                 ("session_page", "세션 확인/페이지")]
+_startup = {}  # 단계 → 초
+
+def report_startup(ready):
+    """지금까지 잰 시작 시간을 상태줄(이벤트)로 보내고, 준비가 끝났으면 파일에도 한 줄 남긴다."""
+    parts = [f"{label} {_startup[key]:.2f}초" for key, label in STARTUP_NAMES if key in _startup]
+    text = "시작: " + " · ".join(parts) + (" — 준비 완료" if ready else " …")
+    uploader.emit({"type": "startup", "text": text}, persist=False)
+    if ready:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        rec = {"ts": datetime.now().isoformat(timespec="seconds"), "frozen": bool(getattr(sys, "frozen", False)),
+               **{k: round(v, 3) for k, v in _startup.items()}}
+        with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
-        # (선택) GUI 입력값을 ENV로 주입 → uploader.try_login_if_needed가 그대로 활용
-        if user:
-            os.environ["GENI_ID"] = user
-        if pw:
-            os.environ["GENI_PW"] = pw
+# ------- 브라우저 스레드(업로드 코어의 이벤트 루프: 미리 띄우기 + 실행) -------
+class BrowserWorker(threading.Thread):
+    """
+    업로드 코어(uploader.AsyncUploader)의 이벤트 루프를 돌리는 스레드. 창이 뜨면 브라우저/세션을 미리 띄워 두고,
+    [실행] 요청은 같은 루프에서 처리한다(미리 열어 둔 페이지를 그대로 이어받음). [중지]는 진행 중인 실행을 취소.
+    """
+
+    def __init__(self, lean):
+        super().__init__(daemon=True)
+        self.lean, self.requests = lean, queue.Queue()
+        self.loop = self.current = None
+
+    def submit(self, fn, *args):
+        self.requests.put((fn, args))
+
+    def cancel(self):
+        """진행 중인 실행 취소(GUI 스레드에서 호출)."""
+        task = self.current
+        if self.loop is not None and task is not None:
+            self.loop.call_soon_threadsafe(task.cancel)
+
+    def stop(self):
+        self.cancel()
+        self.requests.put(None)
+
+    def run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        core = None
+        try:
+            t = time.perf_counter()
+            import playwright.async_api as _pw  # noqa: F401 — 불러오는 시간만 따로 잰다
+            _startup["playwright_import"] = time.perf_counter() - t
+            core = uploader.AsyncUploader(lean=self.lean)
+            report_startup(ready=False)
+            try:
+                await core.start()
+            except Exception as e:
+                print(f"[!] 브라우저 미리 띄우기 실패({e}) → [실행] 때 새로 시작합니다.")
+            _startup.update(core.timings)
+            report_startup(ready=True)
+        except Exception as e:  # Playwright 자체를 못 불러옴 → 실행 때마다 run_async가 직접 시도(오류 표시)
+            print(f"[!] Playwright 시작 실패({e})")
+        try:
+            await self._serve(core)
+        finally:
+            if core is not None:
+                await core.close()  # 세션 저장 후 브라우저 종료
+
+    async def _serve(self, core):
+        while True:
+            req = await asyncio.to_thread(self.requests.get)
+            if req is None:
+                return
+            fn, args = req
+            self.current = asyncio.create_task(fn(*args, core=core))
+            await asyncio.wait({self.current})
+            self.current = None
+
+# ------- 업로더 실행(브라우저 스레드의 이벤트 루프에서) -------
+async def run_uploader(folder_path, user, pw, concurrency, force, recursive, lean, run_btn, stop_btn, core=None):
+    try:
+        run_btn.config(state=tk.DISABLED)
+        stop_btn.config(state=tk.NORMAL)
 
         # 경로 정리
         folder = Path(folder_path.strip().strip('"').strip("'").rstrip("\\/")).expanduser().resolve()
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 업로드 시작: {folder}\n")
 
-        # 핵심: 기존 코드 그대로 호출
-        uploader.run(folder)
+        # 핵심: 업로드 코어 그대로 호출(아이디/비밀번호는 비워 두면 저장된 세션으로 진행)
+        try:
+            n = max(1, int(concurrency))
+        except ValueError:
+            n = uploader.CONCURRENCY
+        await uploader.run_async(folder, ent_id=user or None, ent_pw=pw or None, concurrency=n, force=force,
+                                 recursive=recursive, lean=lean, uploader=core)
 
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 모든 작업 완료!\n")
         messagebox.showinfo("완료", "업로드가 완료되었습니다.")
+    except asyncio.CancelledError:
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 중지했습니다. 다시 실행하면 남은 세트부터 이어서 올립니다.\n")
     except Exception as e:
         print(f"\n[에러] {e}\n")
         messagebox.showerror("오류", str(e))
     finally:
         run_btn.config(state=tk.NORMAL)
+        stop_btn.config(state=tk.DISABLED)
 
 # ------- GUI -------
 def main():
@@ -66,12 +271,12 @@ def main():
     # 폴더 경로
     tk.Label(frm, text="업로드할 폴더 경로").grid(row=0, column=0, sticky="w")
     ent_folder = tk.Entry(frm, width=60)
-    ent_folder.grid(row=1, column=0, columnspan=2, sticky="we", pady=4)
+    ent_folder.grid(row=1, column=0, columnspan=3, sticky="we", pady=4)
     def choose_dir():
         d = filedialog.askdirectory()
         if d:
             ent_folder.delete(0, tk.END); ent_folder.insert(0, d)
-    tk.Button(frm, text="폴더 선택", command=choose_dir).grid(row=1, column=2, padx=6)
+    tk.Button(frm, text="폴더 선택", command=choose_dir).grid(row=1, column=3, padx=6)
 
     # 로그인(선택 입력) — 비워두면 기존 세션으로 진행
     tk.Label(frm, text="지니티처 아이디(선택)").grid(row=2, column=0, sticky="w", pady=(10, 0))
@@ -80,30 +285,73 @@ def main():
     tk.Label(frm, text="지니티처 비밀번호(선택)").grid(row=2, column=1, sticky="w", pady=(10, 0))
     ent_pw = tk.Entry(frm, width=30, show="•"); ent_pw.grid(row=3, column=1, sticky="w")
 
-    # 실행 버튼(백그라운드 스레드에서 run())
+    # 동시 작업 수(워커 페이지 수)
+    tk.Label(frm, text="동시 작업 수").grid(row=2, column=2, sticky="w", pady=(10, 0))
+    spn_conc = tk.Spinbox(frm, from_=1, to=8, width=5)
+    spn_conc.delete(0, tk.END); spn_conc.insert(0, str(uploader.CONCURRENCY))
+    spn_conc.grid(row=3, column=2, sticky="w")
+
+    # 기록(upload_ledger.jsonl) 무시하고 전부 다시 업로드
+    var_force = tk.BooleanVar(value=False)
+    tk.Checkbutton(frm, text="이미 올린 세트도 다시 업로드", variable=var_force).grid(row=4, column=0, sticky="w")
+
+    # 선택한 폴더를 루트로 보고 하위 카테고리 폴더 전체 업로드
+    var_recursive = tk.BooleanVar(value=False)
+    tk.Checkbutton(frm, text="하위 폴더 전체 일괄 업로드", variable=var_recursive).grid(row=4, column=1, sticky="w")
+
+    # 가벼운 모드: 이미지/폰트/외부 요청 차단
+    var_lean = tk.BooleanVar(value=uploader.LEAN)
+    tk.Checkbutton(frm, text="가벼운 모드", variable=var_lean).grid(row=4, column=2, sticky="w")
+
+    # 실행 버튼(브라우저 스레드의 이벤트 루프에서 run_async — 미리 띄운 브라우저를 이어받음)
+    browser = BrowserWorker(var_lean.get())
+    stop_btn = tk.Button(frm, text="중지", width=14, state=tk.DISABLED, command=browser.cancel)
     run_btn = tk.Button(
         frm, text="실행", width=14,
-        command=lambda: threading.Thread(
-            target=run_uploader,
-            args=(ent_folder.get(), ent_id.get(), ent_pw.get(), run_btn),
-            daemon=True
-        ).start()
+        command=lambda: browser.submit(
+            run_uploader,
+            ent_folder.get(), ent_id.get(), ent_pw.get(), spn_conc.get(), var_force.get(), var_recursive.get(), var_lean.get(), run_btn, stop_btn
+        )
     )
-    run_btn.grid(row=3, column=2, padx=6)
+    run_btn.grid(row=3, column=3, padx=6)
+    stop_btn.grid(row=4, column=3, padx=6)
 
-    # 로그 창
-    tk.Label(frm, text="로그").grid(row=4, column=0, sticky="w", pady=(12, 0))
+    # 로그 창(최근 LOG_MAX_LINES줄) — 전체 로그는 파일로
+    log_path = open_log_file()
+    tk.Label(frm, text=f"로그 (전체: {log_path})").grid(row=5, column=0, columnspan=4, sticky="w", pady=(12, 0))
     txt = tk.Text(frm, height=18, width=90)
-    txt.grid(row=5, column=0, columnspan=3, sticky="nsew")
-    frm.rowconfigure(5, weight=1); frm.columnconfigure(0, weight=1); frm.columnconfigure(1, weight=1)
+    txt.grid(row=6, column=0, columnspan=4, sticky="nsew")
+    frm.rowconfigure(6, weight=1); frm.columnconfigure(0, weight=1); frm.columnconfigure(1, weight=1)
+
+    # 진행 상황(업로더 이벤트 기반)
+    progress = ProgressView(frm)
+    progress.frame.grid(row=7, column=0, columnspan=4, sticky="we", pady=(6, 0))
+
+    # 시작 시간(창 표시 → 브라우저/세션 준비)
+    startup_var = tk.StringVar(master=root, value="시작: 측정 중 …")
+    tk.Label(frm, textvariable=startup_var, anchor="w", fg="gray40").grid(row=8, column=0, columnspan=4, sticky="we")
+    pump_events(progress, startup_var)
 
     # stdout/stderr → 로그창
     sys.stdout = TextRedirector(txt)
     sys.stderr = TextRedirector(txt)
     pump_logs(txt)
 
-    root.minsize(760, 480)
+    def on_shown():  # 창이 그려진 뒤에 브라우저 미리 띄우기 시작
+        _startup["window"] = time.perf_counter() - _T0
+        report_startup(ready=False)
+        browser.start()
+
+    def on_close():
+        browser.stop()  # 진행 중인 실행은 취소하고, 세션 저장 후 브라우저 종료
+        root.destroy()
+        browser.join(timeout=5)
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.after_idle(on_shown)
+    root.minsize(760, 620)
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 실행 파일(PyInstaller)에서 사전 점검 프로세스 풀을 쓰기 위해
     main()
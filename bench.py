@@ -0,0 +1,179 @@
+# bench.py — 로컬 대역 사이트(mock_site.py)에 uploader.run()을 돌려 처리량/단계별 지연/브라우저 메모리를 재는 벤치마크
+#
+# 예) python bench.py --sets 20 --concurrency 4
+#     python bench.py --scenario all --channel chromium
+from pathlib import Path
+import argparse, json, os, sys, tempfile, threading, time, zlib
+
+import mock_site
+import uploader
+
+SCENARIOS = {
+    "baseline": {"ocr_delay": 3.0, "ocr_jitter": 1.0, "latency_ms": 0},
+    "slow-network": {"ocr_delay": 3.0, "ocr_jitter": 1.0, "latency_ms": 400},
+    "slow-ocr": {"ocr_delay": 30.0, "ocr_jitter": 10.0, "latency_ms": 0},
+}
+CATEGORY_FOLDER = "기출문제_고3_수학_미적분"
+
+def fake_pdf(pages=1, compressed=False) -> bytes:
+    """
+    페이지 수만 맞춘 최소한의 PDF. compressed면 PDF 1.5처럼 페이지 객체를 압축 객체 스트림(/ObjStm)에 넣고
+    상호참조도 스트림으로 쓴다(스캐너/워드 변환본이 흔히 이 형태 → 사전 점검의 쪽수 세기 확인용).
+    """
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>"]
+    page_objs = ["<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>"] * pages
+    if not compressed:
+        objs += page_objs
+    out, offsets = bytearray(b"%PDF-1.5\n" if compressed else b"%PDF-1.4\n"), []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{obj}\nendobj\n".encode()
+    if not compressed:
+        xref = len(out)
+        out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+        out += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode()
+        out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        return bytes(out)
+    # 객체 스트림: "번호 오프셋" 머리말 + 객체 본문들, FlateDecode
+    body, head = b"", []
+    for i, obj in enumerate(page_objs):
+        head.append(f"{3 + i} {len(body)}")
+        body += obj.encode() + b"\n"
+    head = (" ".join(head) + "\n").encode()
+    stm_num = 3 + pages
+    data = zlib.compress(head + body)
+    offsets.append(len(out))
+    out += (f"{stm_num} 0 obj\n<< /Type /ObjStm /N {pages} /First {len(head)} /Filter /FlateDecode "
+            f"/Length {len(data)} >>\nstream\n").encode() + data + b"\nendstream\nendobj\n"
+    # 상호참조 스트림(/W [1 4 2]): 0번은 free, 카탈로그/페이지 트리/객체 스트림은 오프셋, 페이지는 (스트림, 순번)
+    size = stm_num + 2
+    rows = [(0, 0, 65535), (1, offsets[0], 0), (1, offsets[1], 0)]
+    rows += [(2, stm_num, i) for i in range(pages)]
+    rows += [(1, offsets[2], 0), (1, len(out), 0)]
+    table = b"".join(t.to_bytes(1, "big") + a.to_bytes(4, "big") + c.to_bytes(2, "big") for t, a, c in rows)
+    xref = len(out)
+    out += (f"{size - 1} 0 obj\n<< /Type /XRef /Size {size} /W [1 4 2] /Root 1 0 R /Length {len(table)} >>\n"
+            "stream\n").encode() + table + b"\nendstream\nendobj\n"
+    out += f"startxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def make_pairs(root: Path, n, pages=2):
+    """root/CATEGORY_FOLDER 아래에 n개의 문제/해설 쌍을 만든다(해설은 압축 객체 스트림 형태)."""
+    folder = root / CATEGORY_FOLDER
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(n):
+        base = f"2025_{i % 12 + 1:02d}_벤치{i:03d}"
+        (folder / f"{base}_문제.pdf").write_bytes(fake_pdf(pages))
+        (folder / f"{base}_해설.pdf").write_bytes(fake_pdf(pages, compressed=True))
+    first = sorted(folder.glob("*_문제.pdf"))[0]
+    check = uploader.inspect_pair(first, first.with_name(first.name.replace("_문제", "_해설")))
+    if check["errors"] or check["pages"] != 2 * pages:  # 쪽수를 못 세면 OCR 대기가 기본값으로 돌아간다
+        raise RuntimeError(f"사전 점검이 벤치 PDF를 잘못 읽음: {check}")
+    return folder
+
+class MemorySampler(threading.Thread):
+    """이 프로세스의 하위 프로세스(Playwright 드라이버 + 브라우저) RSS 합계의 최대값. psutil 없으면 생략."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval, self.peak_mb, self._halt = interval, None, threading.Event()
+
+    def run(self):
+        try:
+            import psutil
+        except ImportError:
+            return
+        me = psutil.Process()
+        self.peak_mb = 0.0
+        while not self._halt.is_set():
+            total = 0
+            for child in me.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak_mb = max(self.peak_mb, total / 2**20)
+            self._halt.wait(self.interval)
+
+    def stop(self):
+        self._halt.set()
+        self.join(timeout=2)
+
+def run_scenario(name, sets, concurrency, channel, headless, lean, save_delay, engine="browser"):
+    opts = SCENARIOS[name]
+    # API 엔진은 브라우저 로그인 세션이 없으므로 대역 사이트의 로그인 검사를 끈다
+    server, base_url = mock_site.serve_mock_site(require_login=(engine != "api"), **opts)
+    with tempfile.TemporaryDirectory(prefix="geni_bench_") as tmp:
+        tmp = Path(tmp)
+        folder = make_pairs(tmp, sets)
+        # 실제 세션/기록 파일을 건드리지 않도록 모든 경로를 임시 폴더로
+        uploader.UPLOAD_URL = f"{base_url}/test-paper-upsert?id=0"
+        uploader.STORAGE_PATH = str(tmp / "storage.json")
+        uploader.LEDGER_PATH = str(tmp / "ledger.jsonl")
+        uploader.TRACE_PATH = str(tmp / "trace.jsonl")
+        uploader.SELECTOR_CACHE_PATH = str(tmp / "selectors.json")
+        uploader.CATEGORY_CACHE_PATH = str(tmp / "categories.json")
+        uploader.QUARANTINE_PATH = str(tmp / "quarantine.jsonl")
+        uploader.ACCOUNTS_PATH = str(tmp / "accounts.json")  # 없는 파일 → 기본 계정 하나
+        uploader.LEAN_ALLOWED_HOSTS = ("127.0.0.1",)
+        uploader.EDGE_CHANNEL = channel
+        uploader.SAVE_DELAY_SEC = save_delay
+        uploader.api_engine.API_BASE = base_url
+        uploader.api_engine.ENDPOINTS_PATH = str(tmp / "geni_api.json")
+        if engine == "api":
+            Path(uploader.api_engine.ENDPOINTS_PATH).write_text(
+                json.dumps(uploader.api_engine.EXAMPLE_ENDPOINTS, ensure_ascii=False), encoding="utf-8")
+        os.environ.setdefault("GENI_ID", "bench@example.com")
+        os.environ.setdefault("GENI_PW", "bench")
+
+        mem = MemorySampler()
+        mem.start()
+        start = time.time()
+        try:
+            uploader.run(folder, concurrency=concurrency, force=True, headless=headless, lean=lean,
+                         engine=engine)
+        finally:
+            elapsed = time.time() - start
+            mem.stop()
+            server.shutdown()
+
+    return {
+        "scenario": name, "sets": sets, "concurrency": concurrency, **opts,
+        "saved": server.stats["saved"], "elapsed_sec": round(elapsed, 1),
+        "sets_per_hour": round(server.stats["saved"] / elapsed * 3600, 1) if elapsed else 0,
+        "browser_peak_mb": round(mem.peak_mb, 1) if mem.peak_mb is not None else None,
+        "phases_ms": {k: {m: round(v, 1) for m, v in st.items()} for k, st in uploader.trace_summary().items()},
+        "navigations": uploader.RUN_STATS["navigations"], "blocked": uploader.RUN_STATS["blocked"],
+    }
+
+def print_result(r):
+    mem = f"{r['browser_peak_mb']} MB" if r["browser_peak_mb"] is not None else "n/a (psutil 없음)"
+    print(f"\n▼ [{r['scenario']}] {r['saved']}/{r['sets']}세트, 동시 {r['concurrency']}, "
+          f"{r['elapsed_sec']}초 → {r['sets_per_hour']} sets/hour, 브라우저 최대 메모리 {mem}")
+    for name, st in r["phases_ms"].items():
+        print(f"  {name:<18} p50 {st['p50']:>8.0f}ms  p95 {st['p95']:>8.0f}ms  max {st['max']:>8.0f}ms")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="대역 사이트 기반 업로드 벤치마크")
+    ap.add_argument("--sets", type=int, default=10)
+    ap.add_argument("-j", "--concurrency", type=int, default=1)
+    ap.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="baseline")
+    ap.add_argument("--channel", default=None, help="브라우저 채널(기본: Playwright 번들 Chromium, 예: msedge)")
+    ap.add_argument("--headed", action="store_true", help="브라우저 창 표시")
+    ap.add_argument("--lean", action="store_true")
+    ap.add_argument("--engine", choices=["browser", "api"], default="browser")
+    ap.add_argument("--save-delay", type=float, default=0.5, help="OCR 완료 후 저장까지 지연(초)")
+    ap.add_argument("--json", metavar="PATH", help="결과를 JSON으로 저장")
+    args = ap.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = []
+    for name in names:
+        r = run_scenario(name, args.sets, max(1, args.concurrency), args.channel, not args.headed,
+                         args.lean, args.save_delay, args.engine)
+        print_result(r)
+        results.append(r)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    sys.exit(0 if all(r["saved"] == r["sets"] for r in results) else 1)
@@ -0,0 +1,195 @@
+# hotfolder.py — 감시 폴더에 문제/해설 쌍이 다 들어오는 즉시 업로드하는 상주 모드
+#
+# 예) python hotfolder.py "D:\업로드\기출문제_고3_수학" "D:\업로드\기출문제_고3_과학탐구_물리1"
+#
+# 브라우저/로그인 세션은 한 번 띄워 두고 계속 재사용한다(uploader.AsyncUploader). 감지한 세트는 바로 작업으로
+# 넣으므로 앞 세트의 OCR을 기다리는 동안에도 감시와 다음 세트 업로드가 이어진다. 폴더는 가벼운 폴링으로 본다:
+# 폴더 자체의 수정 시각이 바뀌었을 때만 목록을 다시 읽고, 이미 아는 파일명은 정규식을 다시 돌리지 않는다.
+# (대상 환경이 Windows + Edge라 inotify는 쓰지 않는다.)
+from pathlib import Path
+import argparse, asyncio, os, time
+
+import uploader
+
+# ===================== 설정 =====================
+WATCH_INTERVAL_SEC = 3  # 폴더 확인 주기
+WATCH_SETTLE_SEC = 5  # 파일 크기/수정 시각이 이만큼 그대로여야 '다 써진 파일'로 본다
+WATCH_FULL_RESCAN_SEC = 300  # 폴더 수정 시각과 상관없이 전체를 다시 읽는 주기(덮어쓰기 감지용)
+WATCH_KEEPALIVE_SEC = 600  # 할 일이 없을 때 세션을 확인(필요하면 재로그인)하는 주기
+
+class FolderIndex:
+    """
+    감시 폴더들의 파일 상태를 메모리에 들고 있는 색인.
+    poll()은 새로 '완성된' 쌍만 돌려준다(같은 내용의 쌍은 한 번만).
+    """
+
+    def __init__(self, folders):
+        self.folders = [Path(f) for f in folders]
+        self.dir_mtime = {}  # 폴더 → 마지막으로 읽었을 때의 수정 시각
+        self.files = {}  # 경로 → {"base", "role", "size", "mtime", "since", "settled", "paired"}
+        self.names = {}  # 파일명 → parse_pair_name 결과(정규식 재실행 방지)
+        self.emitted = set()  # (경로, 경로, 크기, 수정 시각, ...) — 이미 넘긴 쌍
+        self.last_full = 0.0
+
+    def _parse(self, name):
+        if name not in self.names:
+            self.names[name] = uploader.parse_pair_name(name)
+        return self.names[name]
+
+    def _list(self, folder):
+        """폴더 목록을 다시 읽어 색인 갱신. 사라진 파일은 지운다."""
+        seen = set()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                parsed = self._parse(entry.name)
+                if isinstance(parsed, str):
+                    continue
+                path = Path(entry.path)
+                seen.add(path)
+                st, f = entry.stat(), self.files.get(path)
+                if f is None:
+                    self.files[path] = {"base": parsed[0], "role": parsed[1], "size": st.st_size,
+                                        "mtime": st.st_mtime_ns, "since": time.time(), "settled": False,
+                                        "paired": False}
+                elif (st.st_size, st.st_mtime_ns) != (f["size"], f["mtime"]):  # 같은 이름으로 덮어씀
+                    f.update(size=st.st_size, mtime=st.st_mtime_ns, since=time.time(), settled=False, paired=False)
+        for path in [p for p in self.files if p.parent == folder and p not in seen]:
+            del self.files[path]
+
+    def _restat(self, now, everything=False):
+        """
+        아직 쓰는 중이거나 업로드로 넘기지 않은 파일(짝이 없거나 검사에서 제외된 쌍)만 크기/수정 시각 확인.
+        전체 재확인 때는 모든 파일. 폴더 수정 시각이 안 바뀌는 제자리 덮어쓰기도 이렇게 잡는다.
+        """
+        for path, f in list(self.files.items()):
+            if f["settled"] and f["paired"] and not everything:
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                del self.files[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (f["size"], f["mtime"]):
+                f.update(size=st.st_size, mtime=st.st_mtime_ns, since=now, settled=False, paired=False)
+            elif now - f["since"] >= WATCH_SETTLE_SEC and f["size"] > 0:
+                f["settled"] = True
+
+    def poll(self):
+        now = time.time()
+        full = now - self.last_full >= WATCH_FULL_RESCAN_SEC
+        if full:
+            self.last_full = now
+        for folder in self.folders:
+            try:
+                mtime = folder.stat().st_mtime_ns
+            except OSError:
+                continue
+            if full or self.dir_mtime.get(folder) != mtime:
+                self.dir_mtime[folder] = mtime
+                self._list(folder)
+        self._restat(now, everything=full)
+
+        by_key = {}
+        for path, f in self.files.items():
+            by_key.setdefault((path.parent, f["base"]), {}).setdefault(f["role"], (path, f))
+        ready = []
+        for (folder, base), roles in sorted(by_key.items()):
+            if "문제" not in roles or "해설" not in roles:
+                continue
+            (prob, pf), (ans, af) = roles["문제"], roles["해설"]
+            if not (pf["settled"] and af["settled"]):
+                continue  # 아직 복사 중
+            key = (prob, ans, pf["size"], pf["mtime"], af["size"], af["mtime"])
+            if key in self.emitted:
+                continue
+            self.emitted.add(key)
+            pf["paired"] = af["paired"] = True
+            ready.append((folder, base, prob, ans))
+        return ready
+
+    def reject(self, prob, ans):
+        """검사/업로드에 실패한 쌍은 다시 지켜본다 → 파일을 고쳐 저장하면 다음 확인 때 다시 넘긴다."""
+        for path in (prob, ans):
+            if path in self.files:
+                self.files[path]["paired"] = False
+
+async def watch_async(folders, ent_id=None, ent_pw=None, interval=WATCH_INTERVAL_SEC, concurrency=1,
+                      headless=uploader.HEADLESS, lean=uploader.LEAN):
+    """취소될 때까지 폴더를 감시하며 완성된 쌍을 바로 업로드 작업으로 넣는다."""
+    folders = [Path(f).expanduser().resolve() for f in folders]
+    for f in folders:
+        if not f.is_dir():
+            raise FileNotFoundError(f"감시할 폴더가 없습니다: {f}")
+    categories = {f: uploader.infer_categories_from_folder(f) for f in folders}
+    index = FolderIndex(folders)
+
+    uploader.start_trace()
+    paths = sorted({tuple(c) for c in categories.values()})
+    async with uploader.AsyncUploader(concurrency, ent_id, ent_pw, headless, lean) as up:
+        catalog, missing = await uploader.prepare_catalog(paths, await up.driver())
+        await up.ready()
+        if missing:
+            async with up.page() as page:
+                await uploader.scrape_category_paths(page, missing, catalog)
+        uploader.check_category_paths(
+            [{"folder": str(f), "categories": c} for f, c in categories.items()], catalog)
+
+        print(f"[*] 감시 시작: {', '.join(str(f) for f in folders)} (Ctrl+C로 종료)")
+        last_work, running = time.time(), set()
+        try:
+            while True:
+                for folder, base, prob, ans in index.poll():
+                    print(f"[+] 새 세트 감지: {folder.name}/{base}")
+                    check = await asyncio.to_thread(uploader.inspect_pair, prob, ans)  # 감지는 몇 세트씩이라 풀 없이
+                    if check["errors"]:
+                        print(f"[!] {folder.name}/{base} 제외 -> {'; '.join(check['errors'])} (파일을 고쳐 다시 저장하면 재검사)")
+                        index.reject(prob, ans)
+                        continue
+                    for job in uploader.plan_jobs([(base, prob, ans)], folder, categories[folder],
+                                                  checks={(prob, ans): check}):
+                        running.add(up.submit_job(job))
+                finished = {h for h in running if h.done()}
+                running -= finished
+                for h in finished:
+                    if not h.task.cancelled() and h.task.exception():  # 세트 밖의 오류(세션/브라우저)도 감시는 계속
+                        print(f"[에러] {h.base} : {h.task.exception()} — 다시 시도하려면 파일을 다시 저장하세요.")
+                        index.reject(h.job["problem"], h.job["answer"])
+                    elif h.task.result() == "quarantined":
+                        index.reject(h.job["problem"], h.job["answer"])
+                if running:
+                    last_work = time.time()
+                elif finished:  # 한꺼번에 감지된 세트가 모두 끝나면 결과 출력
+                    uploader.print_run_report(up.report)
+                    up.report = uploader.new_run_report()
+                    last_work = time.time()
+                elif time.time() - last_work > WATCH_KEEPALIVE_SEC:
+                    async with up.page() as page:  # 가벼운 요청 1회, 만료 시 재로그인
+                        await up.pool.for_worker(0).refresh_if_needed(page, force=True)
+                    last_work = time.time()
+                await asyncio.sleep(interval)
+        finally:
+            for h in running:
+                h.cancel()
+            await asyncio.gather(*(h.task for h in running), return_exceptions=True)
+            uploader.print_trace_summary()
+
+def watch(folders, ent_id=None, ent_pw=None, interval=WATCH_INTERVAL_SEC, concurrency=1,
+          headless=uploader.HEADLESS, lean=uploader.LEAN):
+    """Ctrl+C로 멈출 때까지 폴더를 감시하며 완성된 쌍을 바로 업로드."""
+    try:
+        asyncio.run(watch_async(folders, ent_id, ent_pw, interval, concurrency, headless, lean))
+    except KeyboardInterrupt:
+        print("\n[*] 감시 종료")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="폴더 감시 → 문제/해설 쌍 자동 업로드")
+    ap.add_argument("folders", nargs="+", help="감시할 카테고리 폴더(여러 개 가능)")
+    ap.add_argument("--interval", type=float, default=WATCH_INTERVAL_SEC, help="폴더 확인 주기(초)")
+    ap.add_argument("-j", "--concurrency", type=int, default=1)
+    ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--lean", action="store_true")
+    args = ap.parse_args()
+    watch([uploader.clean_path(f) for f in args.folders], interval=args.interval,
+          concurrency=max(1, args.concurrency), headless=args.headless, lean=args.lean)
@@ -0,0 +1,177 @@
+# mock_site.py — 로컬에서 돌리는 GENITEACHER 대역 사이트(벤치마크/개발용)
+#
+# uploader.py가 의존하는 부분만 흉내 낸다:
+#   /login                     로그인 폼(POST 시 SESSION 쿠키 발급)
+#   /test-paper-upsert?id=0    학습지명 입력, 카테고리 단계 선택, 파일 입력 2개, [다음]
+#                              → OCR 단계('문제 설정', 지연+흔들림) → [저장하기]
+#   /test-paper                문제 관리(목록)
+#   /api/test-paper...         화면이 쓰는 API(api_engine.EXAMPLE_ENDPOINTS와 같은 모양)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from pathlib import Path
+import argparse, json, random, re, threading, time
+
+FIXTURES = Path(__file__).resolve().parent / "mock_fixtures"
+SESSION_COOKIE = "SESSION"
+
+# 카테고리 트리(폴더명 규칙 '1차_2차_3차_4차'와 같은 단계 구조)
+DEFAULT_TREE = {
+    "기출문제": {
+        grade: {
+            "수학": {"수학1": {}, "수학2": {}, "미적분": {}, "기하": {}, "확률과통계": {}},
+            "과학탐구": {"물리1": {}, "화학1": {}, "생명과학1": {}, "지구과학1": {}},
+            "국어": {}, "영어": {},
+        }
+        for grade in ("고1", "고2", "고3")
+    },
+    "모의고사": {grade: {"수학": {}, "국어": {}, "영어": {}} for grade in ("고1", "고2", "고3")},
+}
+
+DEFAULT_OPTIONS = {
+    "ocr_delay": 3.0,  # 파일 업로드 후 OCR 완료까지(초)
+    "ocr_jitter": 1.0,  # OCR 지연에 더하는 ±흔들림(초)
+    "latency_ms": 0,  # 모든 요청에 더하는 응답 지연(느린 네트워크 흉내)
+    "category_delay_ms": 150,  # 카테고리 클릭 후 다음 단계가 그려지기까지
+    "poll_ms": 1000,  # 화면이 OCR 상태를 조회하는 간격
+    "questions": 20,  # OCR 결과 문항 수
+    "require_login": True,
+}
+
+def _fixture(name, **values):
+    html = (FIXTURES / name).read_text(encoding="utf-8")
+    for key, val in values.items():
+        html = html.replace("{{" + key + "}}", str(val))
+    return html.encode("utf-8")
+
+def serve_mock_site(port=0, tree=None, **options):
+    """대역 사이트를 백그라운드 스레드로 띄움. (server, base_url) 반환. server.stats로 집계 확인."""
+    opts = {**DEFAULT_OPTIONS, **options}
+    tree = tree or DEFAULT_TREE
+    lock = threading.Lock()
+    docs = {}  # id → {name, categories, ready_at, saved}
+    stats = {"requests": 0, "logins": 0, "created": 0, "uploaded_bytes": 0, "saved": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body=b"", ctype="text/html; charset=utf-8", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, data, status=200):
+            self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+        def _redirect(self, location, headers=None):
+            self._send(302, headers={"Location": location, **(headers or {})})
+
+        def _logged_in(self):
+            if not opts["require_login"]:
+                return True
+            return f"{SESSION_COOKIE}=mock" in (self.headers.get("Cookie") or "")
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _begin(self):
+            with lock:
+                stats["requests"] += 1
+            if opts["latency_ms"]:
+                time.sleep(opts["latency_ms"] / 1000)
+            return urlsplit(self.path)
+
+        def do_GET(self):
+            url = self._begin()
+            if url.path == "/login":
+                return self._send(200, _fixture("login.html"))
+            if url.path in ("/", "/test-paper", "/test-paper-upsert") and not self._logged_in():
+                return self._redirect("/login")
+            if url.path in ("/", "/test-paper"):
+                with lock:
+                    saved = sum(1 for d in docs.values() if d["saved"])
+                return self._send(200, _fixture("list.html", saved=saved))
+            if url.path == "/test-paper-upsert":
+                with lock:
+                    pending = [i for i, d in docs.items() if not d["saved"] and d["ready_at"]]
+                config = {"tree": tree, "docs": pending, "category_delay_ms": opts["category_delay_ms"],
+                          "poll_ms": opts["poll_ms"]}
+                return self._send(200, _fixture("upsert.html", config=json.dumps(config, ensure_ascii=False)))
+            m = re.fullmatch(r"/api/test-paper/(\d+)/ocr-status", url.path)
+            if m:
+                return self._ocr_status(int(m.group(1)))
+            if url.path == "/api/categories":
+                return self._json({"data": tree})
+            if url.path == "/__stats":
+                with lock:
+                    return self._json(dict(stats))
+            self._send(404, b"not found")
+
+        def do_POST(self):
+            url = self._begin()
+            body = self._body()
+            if url.path == "/login":
+                form = parse_qs(body.decode("utf-8", "replace"))
+                if not form.get("email") or not form.get("password"):
+                    return self._redirect("/login")
+                with lock:
+                    stats["logins"] += 1
+                return self._redirect("/test-paper-upsert?id=0",
+                                      {"Set-Cookie": f"{SESSION_COOKIE}=mock; Path=/; HttpOnly"})
+            if not self._logged_in():
+                return self._json({"message": "unauthorized"}, 401)
+            if url.path == "/api/test-paper":
+                data = json.loads(body or b"{}")
+                with lock:
+                    doc_id = len(docs) + 1
+                    docs[doc_id] = {"name": data.get("name"), "categories": data.get("categories"),
+                                    "ready_at": None, "saved": False}
+                    stats["created"] += 1
+                return self._json({"data": {"id": doc_id}})
+            m = re.fullmatch(r"/api/test-paper/(\d+)/(files|save)", url.path)
+            if m and int(m.group(1)) in docs:
+                doc = docs[int(m.group(1))]
+                with lock:
+                    if m.group(2) == "files":
+                        delay = opts["ocr_delay"] + random.uniform(-opts["ocr_jitter"], opts["ocr_jitter"])
+                        doc["ready_at"] = time.time() + max(0.0, delay)
+                        stats["uploaded_bytes"] += len(body)
+                    else:
+                        doc["saved"] = True
+                        stats["saved"] += 1
+                return self._json({"data": {"id": int(m.group(1))}})
+            self._send(404, b"not found")
+
+        def _ocr_status(self, doc_id):
+            doc = docs.get(doc_id)
+            if doc is None or doc["ready_at"] is None:
+                return self._json({"status": "NOT_FOUND"}, 404)
+            if time.time() >= doc["ready_at"]:
+                return self._json({"status": "DONE", "questions": opts["questions"]})
+            return self._json({"status": "RUNNING"})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.stats, server.docs, server.options = stats, docs, opts
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="로컬 GENITEACHER 대역 사이트")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--ocr-delay", type=float, default=DEFAULT_OPTIONS["ocr_delay"])
+    ap.add_argument("--ocr-jitter", type=float, default=DEFAULT_OPTIONS["ocr_jitter"])
+    ap.add_argument("--latency-ms", type=int, default=DEFAULT_OPTIONS["latency_ms"])
+    args = ap.parse_args()
+    server, base_url = serve_mock_site(args.port, ocr_delay=args.ocr_delay,
+                                       ocr_jitter=args.ocr_jitter, latency_ms=args.latency_ms)
+    print(f"[*] 대역 사이트 실행 중: {base_url}/test-paper-upsert?id=0  (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
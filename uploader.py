@@ -1,16 +1,140 @@
 # uploader.py — GENITEACHER 다중 세트(10월/11월 등) 순차 업로드 + OCR 대기 + 저장(5초 딜레이)
-from playwright.sync_api import sync_playwright
+# playwright는 무거우므로 실제로 브라우저를 띄울 때 불러온다(GUI 창이 먼저 뜨도록).
+# 브라우저 쪽은 asyncio(playwright.async_api) 위에서 돈다: AsyncUploader가 이벤트 루프 하나로 여러 페이지를
+# 돌리고, run()/GUI/감시 모드는 그 위의 얇은 껍데기다. API 엔진(api_engine.py)도 같은 드라이버로 요청을 보낸다.
 from pathlib import Path
 from getpass import getpass
-import os, re, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+import argparse, asyncio, contextvars, difflib, hashlib, io, json, math, os, re, struct, time, zipfile, zlib
+
+import api_engine
 
 # ===================== 설정 =====================
 UPLOAD_URL = "https://www.geniteacher.com/test-paper-upsert?id=0"  # 문제 생성 페이지
 CATEGORIES = ["기출문제", "고3", "수학"]  # 클릭 순서 (기본값)
 STORAGE_PATH = "geni_storage.json"  # 세션 파일
+ACCOUNTS_PATH = "geni_accounts.json"  # 여러 계정으로 나눠 올릴 때: [{"id": ..., "pw" 또는 "pw_env": ..., "storage": ...}, ...]
+SESSION_CHECK_SEC = 10 * 60  # 작업 중 세션이 살아 있는지 가벼운 요청으로 다시 확인하는 주기
+SESSION_REFRESH_MARGIN_SEC = 15 * 60  # 로그인 쿠키 만료까지 이만큼 남으면 미리 다시 로그인
+LEDGER_PATH = "upload_ledger.jsonl"  # 세트별 진행 기록(추가 전용) — 재실행 시 건너뛰기/이어하기
+TRACE_PATH = "upload_trace.jsonl"  # 단계별 시간 기록(JSONL, 실행마다 이어 씀)
+SELECTOR_CACHE_PATH = "geni_selectors.json"  # 요소별로 실제로 맞았던 선택자 전략(다음 실행에서 먼저 시도)
+CATEGORY_CACHE_PATH = "geni_categories.json"  # 카테고리 트리 캐시
+CATEGORY_TTL_SEC = 24 * 3600  # 카테고리 캐시 유효 시간
+CATEGORY_WAIT_MS = 10000  # 카테고리 한 단계가 그려질 때까지 최대 대기
 EDGE_CHANNEL = "msedge"  # Edge 실행
-OCR_TIMEOUT_MS = 15 * 60 * 1000  # OCR 최대 대기(15분)
+HEADLESS = False  # True면 브라우저 창 없이 실행
+LEAN = False  # True면 이미지/폰트/미디어와 외부 호스트 요청을 차단(가벼운 모드)
+LEAN_BLOCK_TYPES = {"image", "font", "media"}  # 가벼운 모드에서 차단하는 리소스 종류
+LEAN_ALLOWED_HOSTS = ("geniteacher.com",)  # 가벼운 모드에서 허용하는 호스트(하위 도메인 포함). 화면이 깨지면 CDN 호스트 추가
+OCR_TIMEOUT_MS = 15 * 60 * 1000  # OCR 최대 대기(15분) — 쪽수를 모를 때
+OCR_TIMEOUT_BASE_MS = 3 * 60 * 1000  # 쪽수를 알 때: 기본 대기 + 쪽당 대기
+OCR_TIMEOUT_PER_PAGE_MS = 20 * 1000
+MAX_FILE_MB = 200  # 사전 점검: 이보다 큰 파일은 업로드 전에 제외
+PREFLIGHT_WORKERS = None  # 사전 점검 프로세스 수(None이면 CPU 수)
+RETRY_ATTEMPTS = 3  # 세트 하나를 시도하는 최대 횟수(실패하면 새 페이지에서 다시)
+RETRY_BACKOFF_SEC = 30  # 첫 재시도 전 대기. 재시도마다 두 배
+RETRY_BACKOFF_MAX_SEC = 600
+QUARANTINE_PATH = "upload_quarantine.jsonl"  # 끝내 실패한 세트 목록(추가 전용)
 SAVE_DELAY_SEC = 5  # OCR 완료 후 저장까지 지연(초)
+CONCURRENCY = 1  # 동시에 처리할 세트 수(= 워커 페이지 수). 1이면 기존 순차 방식
+ENGINE = "browser"  # "api"면 API 엔진(api_engine.py)을 먼저 쓰고, 실패한 세트는 브라우저로
+API_MAX_FAILS = 2  # API 엔진이 연속으로 이만큼 실패하면 남은 세트는 모두 브라우저 엔진으로
+OCR_START_GRACE_MS = 120000  # [다음] 클릭 후 '문제 설정' 화면이 뜰 때까지 최대 대기
+OCR_FALLBACK_SEC = 15  # 이벤트 신호가 없을 때 기존 휴리스틱(본문 검사)을 돌리는 간격(초)
+
+# ===================== 계측(단계별 시간 기록) =====================
+# 이벤트 하나 = dict. type="phase"(단계 1회), "set"(세트 시작/완료/실패), "run"(실행 시작/끝).
+# JSONL로 TRACE_PATH에 쓰고, add_event_listener로 등록한 함수(GUI 등)에도 그대로 전달한다.
+# "phase_start"(단계 시작)는 진행 화면용이라 리스너에게만 보낸다.
+# 같은 세트 이름이 여러 폴더에 있을 수 있으므로 세트 이벤트에는 작업 id(job: "폴더/세트")도 싣는다.
+# 작업을 처리하는 태스크가 _JOB에 id를 두면 그 안의 emit(단계 포함)에 자동으로 붙는다.
+# 재시도마다 _ATTEMPT(1부터)도 바꿔 두어, 같은 세트의 단계 기록이 몇 번째 시도의 것인지(attempt) 구분한다.
+_TRACE = {"run_id": None, "set": None, "durations": {}, "listeners": []}
+_JOB = contextvars.ContextVar("upload_job", default=None)
+_ATTEMPT = contextvars.ContextVar("upload_attempt", default=None)
+
+def add_event_listener(fn):
+    """이벤트를 받을 함수 등록. 업로드 스레드에서 호출되므로 GUI는 큐로 넘겨 받을 것."""
+    _TRACE["listeners"].append(fn)
+
+def remove_event_listener(fn):
+    if fn in _TRACE["listeners"]:
+        _TRACE["listeners"].remove(fn)
+
+def emit(event: dict, persist=True):
+    event = {"ts": round(time.time(), 3), "run": _TRACE["run_id"], **event}
+    if _JOB.get() and "job" not in event:
+        event["job"] = _JOB.get()
+    if _ATTEMPT.get() and "attempt" not in event:
+        event["attempt"] = _ATTEMPT.get()
+    if persist and _TRACE["run_id"]:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+    for fn in list(_TRACE["listeners"]):
+        try:
+            fn(event)
+        except Exception:
+            pass
+
+def start_trace():
+    """실행 시작. 단계 시간과 실행 단위 집계(이동/차단 수, 선택자 적중)를 비운다(GUI는 한 프로세스에서 여러 번 실행)."""
+    _TRACE.update(run_id=datetime.now().strftime("%Y%m%d-%H%M%S"), set=None, durations={})
+    RUN_STATS.update(navigations=0, blocked=0)
+    _SELECTORS["stats"] = {}
+    emit({"type": "run", "state": "start"})
+
+def set_trace_set(base):
+    """이후 phase()가 어느 세트의 것인지 지정(순차 구간에서만 의미 있음)."""
+    _TRACE["set"] = base
+
+def emit_phase(name, start, end, base=None, ok=True, **fields):
+    dur = (end - start) * 1000
+    _TRACE["durations"].setdefault(name, []).append(dur)
+    emit({"type": "phase", "phase": name, "set": base if base is not None else _TRACE["set"],
+          "start": round(start, 3), "end": round(end, 3), "duration_ms": round(dur, 1),
+          "ok": ok, **fields})
+
+def emit_phase_start(name, base=None, **fields):
+    emit({"type": "phase_start", "phase": name, "set": base if base is not None else _TRACE["set"], **fields},
+         persist=False)
+
+@contextmanager
+def phase(name, base=None, **fields):
+    """with phase("click_save") as info: ... info["selector"] = ... 처럼 부가 정보를 채워 넣는다."""
+    info, start, ok = dict(fields), time.time(), False
+    emit_phase_start(name, base)
+    try:
+        yield info
+        ok = True
+    finally:
+        emit_phase(name, start, time.time(), base=base, ok=ok, **info)
+
+def _percentile(values, pct):
+    vals = sorted(values)
+    k = max(0, min(len(vals) - 1, math.ceil(pct / 100 * len(vals)) - 1))
+    return vals[k]
+
+def trace_summary():
+    """단계별 {count, p50, p95, max} (ms)."""
+    return {
+        name: {"count": len(v), "p50": _percentile(v, 50), "p95": _percentile(v, 95), "max": max(v)}
+        for name, v in _TRACE["durations"].items() if v
+    }
+
+def print_trace_summary():
+    summary = trace_summary()
+    if not summary:
+        return
+    print(f"\n▼ 단계별 소요 시간 (초) — 상세: {TRACE_PATH}")
+    print(f"  {'단계':<18}{'횟수':>5}{'p50':>9}{'p95':>9}{'max':>9}")
+    for name, st in summary.items():
+        print(f"  {name:<18}{st['count']:>5}{st['p50']/1000:>9.1f}{st['p95']/1000:>9.1f}{st['max']/1000:>9.1f}")
+    emit({"type": "run", "state": "end", "summary": summary})
 
 # ===================== 파일명 인식 =====================
 ALLOWED_EXTS = {".pdf", ".doc", ".docx"}
@@ -32,6 +156,15 @@ PATTERN = re.compile(
     re.IGNORECASE | re.VERBOSE
 )
 
+def parse_pair_name(name: str):
+    """파일명 → (base, '문제'|'해설'). 대상이 아니면 스킵 이유 문자열."""
+    if not any(sfx.lower() in ALLOWED_EXTS for sfx in Path(name).suffixes):
+        return "확장자 제외"
+    m = PATTERN.match(name.strip())
+    if not m:
+        return "이름 패턴 불일치"
+    return m.group("base").strip(), ("문제" if "문제" in m.group("role") else "해설")
+
 def find_all_pairs_in_folder(folder: Path, debug=True):
     """폴더 안의 모든 (base, 문제, 해설) 쌍을 반환. base 오름차순 정렬."""
     if not folder.exists(): raise FileNotFoundError(f"경로가 존재하지 않습니다: {folder}")
@@ -41,14 +174,11 @@ def find_all_pairs_in_folder(folder: Path, debug=True):
     for p in folder.iterdir():
         if not p.is_file():
             continue
-        if not any(sfx.lower() in ALLOWED_EXTS for sfx in p.suffixes):
-            skipped.append((p.name, "확장자 제외")); continue
-        m = PATTERN.match(p.name.strip())
-        if not m:
-            skipped.append((p.name, "이름 패턴 불일치")); continue
-        
-        base = m.group("base").strip()
-        role = "문제" if "문제" in m.group("role") else "해설"
+        parsed = parse_pair_name(p.name)
+        if isinstance(parsed, str):
+            skipped.append((p.name, parsed)); continue
+
+        base, role = parsed
         d = by_base.setdefault(base, {})
         d.setdefault(role, p)
 
@@ -81,7 +211,11 @@ def infer_categories_from_folder(folder: Path):
     예: C:\\...\\기출문제_고3_수학 → ['기출문제', '고3', '수학']
     규칙이 아니면 기본 CATEGORIES를 그대로 반환.
     """
-    name = folder.name.strip()
+    return split_category_name(folder.name) or CATEGORIES[:]
+
+def split_category_name(name: str):
+    """'1차_2차_3차(_4차)' 형태의 폴더명이면 카테고리 배열, 아니면 None."""
+    name = name.strip()
     separators = ["_", "-", " "]
     parts = []
     
@@ -94,27 +228,167 @@ def infer_categories_from_folder(folder: Path):
     if len(parts) > 1 and len(parts) <= 4:
         return [p.replace(" ", "") for p in parts]
     
-    return CATEGORIES[:]
+    return None
+
+def find_category_folders(root: Path):
+    """
+    root 아래(자기 자신 포함)에서 폴더명이 카테고리 규칙에 맞고 업로드할 쌍이 있는 폴더를 찾는다.
+    반환: [(폴더, 카테고리, 쌍 목록)] — 경로 순 정렬.
+    """
+    if not root.exists(): raise FileNotFoundError(f"경로가 존재하지 않습니다: {root}")
+    if not root.is_dir(): raise FileNotFoundError(f"폴더가 아니라 파일입니다: {root}")
+
+    found = []
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames.sort()
+        folder = Path(dirpath)
+        cats = split_category_name(folder.name)
+        if not cats:
+            continue
+        try:
+            pairs = find_all_pairs_in_folder(folder, debug=False)
+        except FileNotFoundError:
+            continue
+        found.append((folder, cats, pairs))
+    return found
+
+RUN_STATS = {"navigations": 0, "blocked": 0}  # 실행 1회 동안의 페이지 로드/차단 요청 수
 
-def get_browser_and_context(p):
-    """세션 파일(STORAGE_PATH) 있으면 재사용, 없으면 새 컨텍스트."""
-    browser = p.chromium.launch(headless=False, channel=EDGE_CHANNEL)
-    if os.path.exists(STORAGE_PATH):
-        ctx = browser.new_context(storage_state=STORAGE_PATH)
+async def _lean_route(route):
+    """가벼운 모드: 꼭 필요하지 않은 리소스와 외부 호스트 요청은 중단."""
+    req = route.request
+    host = urlsplit(req.url).hostname or ""
+    first_party = any(host == h or host.endswith("." + h) for h in LEAN_ALLOWED_HOSTS)
+    if req.resource_type in LEAN_BLOCK_TYPES or not first_party:
+        RUN_STATS["blocked"] += 1
+        await route.abort()
     else:
-        ctx = browser.new_context()
-    return browser, ctx
+        await route.continue_()
+
+def _count_page_loads(page):
+    """
+    실제 문서 로드만 센다. framenavigated는 pushState/replaceState 같은 같은 문서 안의 이동에도 불려
+    세트당 '생성 페이지 로드 1회'를 확인할 수 없다 → 메인 프레임에서만 오는 domcontentloaded로.
+    """
+    def on_load(_):
+        RUN_STATS["navigations"] += 1
+    page.on("domcontentloaded", on_load)
+
+async def launch_browser(p, headless=HEADLESS):
+    return await p.chromium.launch(headless=headless, channel=EDGE_CHANNEL)
+
+async def new_session_context(browser, storage_path=None, lean=LEAN):
+    """세션 파일이 있으면 재사용, 없으면 새 컨텍스트. lean이면 불필요한 요청 차단."""
+    storage_path = storage_path or STORAGE_PATH
+    if os.path.exists(storage_path):
+        ctx = await browser.new_context(storage_state=storage_path)
+    else:
+        ctx = await browser.new_context()
+    if lean:
+        await ctx.route("**/*", _lean_route)
+    ctx.on("page", _count_page_loads)
+    return ctx
+
+def report_run_stats():
+    print(f"▶ 페이지 로드 {RUN_STATS['navigations']}회, 차단한 요청 {RUN_STATS['blocked']}건")
 
-def on_create_page(page) -> bool:
+# ===================== 선택자 학습 캐시 =====================
+# 논리적 요소마다 후보 전략 목록(이름, 로케이터 생성 함수). 실제로 맞은 전략을 기억해 두고
+# 다음에는 그것부터 시도한다. 기억한 전략이 실패할 때만 전체 목록을 돌고 새로 학습.
+SELECTOR_STRATEGIES = {
+    "name_input": [
+        ("placeholder", lambda page: page.locator("input[placeholder*='학습지명']")),
+        ("label-xpath", lambda page: page.locator(
+            "xpath=//label[contains(., '학습지명') or contains(., '문제지명')]/following::input[1]")),
+    ],
+    "next_button": [
+        ("role", lambda page: page.get_by_role("button", name=re.compile("^다음$"))),
+        ("has-text", lambda page: page.locator("button:has-text('다음')")),
+    ],
+    "save_button": [
+        ("has-text:저장하기", lambda page: page.locator("button:has-text('저장하기')")),
+        ("has-text:저장", lambda page: page.locator("button:has-text('저장')")),
+        ("has-text:완료", lambda page: page.locator("button:has-text('완료')")),
+        ("role", lambda page: page.get_by_role("button", name=re.compile("저장하기|저장|완료"))),
+    ],
+    "mgmt_link": [
+        ("role-link", lambda page: page.get_by_role("link", name=re.compile(r"^문제\s*관리$"))),
+        ("text-exact", lambda page: page.get_by_text("문제 관리", exact=True)),
+        ("text", lambda page: page.locator("text=문제 관리")),
+    ],
+    "create_link": [
+        ("role-link", lambda page: page.get_by_role("link", name=re.compile(r"문제\s*(생성|등록|만들기)"))),
+        ("role-button", lambda page: page.get_by_role("button", name=re.compile(r"문제\s*(생성|등록|만들기)"))),
+        ("href", lambda page: page.locator("a[href*='test-paper-upsert']")),
+    ],
+}
+
+# learned: 요소 → 전략 이름, stats: 요소 → {hit, miss, none}
+_SELECTORS = {"learned": None, "stats": {}}
+
+def _learned_selectors():
+    if _SELECTORS["learned"] is None:
+        try:
+            with open(SELECTOR_CACHE_PATH, encoding="utf-8") as f:
+                _SELECTORS["learned"] = json.load(f)
+        except (OSError, ValueError):
+            _SELECTORS["learned"] = {}
+    return _SELECTORS["learned"]
+
+def _learn_selector(key, name):
+    learned = _learned_selectors()
+    old = learned.get(key)
+    learned[key] = name
+    print(f"[selector] {key}: '{name}' 학습" + (f" (이전 '{old}' 실패)" if old else ""))
+    try:
+        with open(SELECTOR_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(learned, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+async def resolve(page, key, info=None):
+    """
+    논리적 요소 key의 로케이터를 찾아 반환(없으면 None). 기억한 전략이 맞으면 count() 한 번으로 끝.
+    info(dict)를 주면 쓰인 전략 이름과 적중 여부를 채워 넣는다.
+    """
+    strategies = SELECTOR_STRATEGIES[key]
+    remembered = _learned_selectors().get(key)
+    st = _SELECTORS["stats"].setdefault(key, {"hit": 0, "miss": 0, "none": 0})
+    if remembered:
+        for name, make in strategies:
+            if name == remembered:
+                loc = make(page)
+                if await loc.count():
+                    st["hit"] += 1
+                    if info is not None:
+                        info.update(selector=name, selector_hit=True)
+                    return loc
+                break
+    for name, make in strategies:
+        if name == remembered:
+            continue
+        loc = make(page)
+        if await loc.count():
+            st["miss"] += 1
+            _learn_selector(key, name)
+            if info is not None:
+                info.update(selector=name, selector_hit=False)
+            return loc
+    st["none"] += 1
+    return None
+
+def report_selector_stats():
+    stats = _SELECTORS["stats"]
+    if not stats:
+        return
+    print("▶ 선택자 캐시: " + ", ".join(
+        f"{key} 적중 {st['hit']}/미적중 {st['miss']}/없음 {st['none']}" for key, st in stats.items()))
+
+async def on_create_page(page) -> bool:
     """문제 생성 페이지인지 판별: '학습지명/문제지명' 인풋 존재 확인"""
-    field = page.locator("input[placeholder*='학습지명']")
-    if field.count() == 0:
-        field = page.locator(
-            "xpath=//label[contains(., '학습지명') or contains(., '문제지명')]/following::input[1]"
-        )
-    return field.count() > 0
+    return await resolve(page, "name_input") is not None
 
-def try_login_if_needed(page, user, pw):
+async def try_login_if_needed(page, user, pw):
     """
     로그인 페이지면 자동 로그인 후 문제 생성 페이지로 이동.
     GUI에서 전달받은 아이디/비밀번호를 사용.
@@ -127,209 +401,1687 @@ def try_login_if_needed(page, user, pw):
     if not pw:
         pw = os.getenv("GENI_PW")
     
-    if not user:
-        user = input("GENITEACHER 아이디: ").strip()
+    if not user:  # 콘솔 입력은 이벤트 루프를 막지 않도록 스레드에서
+        user = (await asyncio.to_thread(input, "GENITEACHER 아이디: ")).strip()
     if not pw:
-        pw = getpass("GENITEACHER 비밀번호: ").strip()
+        pw = (await asyncio.to_thread(getpass, "GENITEACHER 비밀번호: ")).strip()
         
     if not user or not pw:
         raise RuntimeError("아이디/비밀번호가 비었습니다.")
 
     print("[*] 로그인 페이지 감지 → 자동 로그인")
-    page.fill("input[name*='email' i], input[name*='id' i], input[name*='user' i], input[type='text']", user)
-    page.fill("input[type='password'], input[name*='pass' i]", pw)
-    btn = page.get_by_role("button", name=re.compile("로그인|Login|Sign in", re.I))
-    if btn.count() == 0:
-        btn = page.locator("button[type='submit'], input[type='submit']").first
-    btn.click()
+    with phase("login"):
+        await page.fill("input[name*='email' i], input[name*='id' i], input[name*='user' i], input[type='text']", user)
+        await page.fill("input[type='password'], input[name*='pass' i]", pw)
+        btn = page.get_by_role("button", name=re.compile("로그인|Login|Sign in", re.I))
+        if await btn.count() == 0:
+            btn = page.locator("button[type='submit'], input[type='submit']").first
+        await btn.click()
+
+        await page.wait_for_load_state("networkidle")
+        try:  # 고정 대기 대신 로그인 화면을 벗어날 때까지(실패해도 아래에서 다시 이동)
+            await page.wait_for_url(lambda url: "login" not in url.lower(), timeout=5000)
+        except Exception:
+            pass
+        await page.goto(UPLOAD_URL, wait_until="load")
+        await page.wait_for_load_state("networkidle")
 
-    page.wait_for_load_state("networkidle")
-    time.sleep(0.8)
-    page.goto(UPLOAD_URL, wait_until="load")
-    page.wait_for_load_state("networkidle")
+# 페이지별 상태: "fresh" = 문제 생성 페이지를 막 새로 열어 아직 손대지 않음, "dirty" = 세트를 진행한 페이지
+_PAGE_STATE = {}
 
-def reach_create_page(page, user, pw, max_steps=4):
+def mark_page(page, state):
+    if page not in _PAGE_STATE:
+        page.on("close", lambda _: _PAGE_STATE.pop(page, None))
+    _PAGE_STATE[page] = state
+
+async def goto_create_page(page):
+    """문제 생성 페이지를 한 번 열고, 실제로 생성 화면이면 fresh로 표시."""
+    await page.goto(UPLOAD_URL, wait_until="load")
+    await page.wait_for_load_state("networkidle")
+    if await on_create_page(page):
+        mark_page(page, "fresh")
+        return True
+    return False
+
+async def reach_create_page(page, user, pw, max_steps=4):
     """
     어디로 리다이렉트되든 최종적으로 '문제 생성' 페이지로 진입.
+    이미 새로 열어 둔(fresh) 페이지면 다시 이동하지 않는다.
     """
+    if _PAGE_STATE.get(page) == "fresh":
+        return
+    session = _PAGE_SESSION.get(page)
+    if session is not None:  # 계정별 세션의 페이지면 그 계정으로 로그인
+        user, pw = user or session.user, pw or session.pw
     for _ in range(max_steps):
-        if on_create_page(page):
+        if _PAGE_STATE.get(page) != "dirty" and await on_create_page(page):
+            mark_page(page, "fresh")
             return
-        page.goto(UPLOAD_URL, wait_until="load")
-        page.wait_for_load_state("networkidle")
-        if on_create_page(page):
+        if await goto_create_page(page):
             return
         if "login" in page.url.lower():
-            try_login_if_needed(page, user, pw)
-            if on_create_page(page):
+            await try_login_if_needed(page, user, pw)
+            if await on_create_page(page):
+                mark_page(page, "fresh")
                 return
         try:
-            mgmt = (page.get_by_role("link", name=re.compile("^문제\s*관리$")) |
-                    page.get_by_text("문제 관리", exact=True) |
-                    page.locator("text=문제 관리").first)
-            if mgmt.count():
-                mgmt.click(); page.wait_for_load_state("networkidle")
+            mgmt = await resolve(page, "mgmt_link")
+            if mgmt is not None:
+                await mgmt.first.click(); await page.wait_for_load_state("networkidle")
         except Exception:
             pass
         try:
-            create_btn = (page.get_by_role("link", name=re.compile("문제\s*(생성|등록|만들기)")) |
-                          page.get_by_role("button", name=re.compile("문제\s*(생성|등록|만들기)")) |
-                          page.locator("a[href*='test-paper-upsert']").first)
-            if create_btn.count():
-                create_btn.click(); page.wait_for_load_state("networkidle")
-                if on_create_page(page): return
+            create_btn = await resolve(page, "create_link")
+            if create_btn is not None:
+                await create_btn.first.click(); await page.wait_for_load_state("networkidle")
+                if await on_create_page(page):
+                    mark_page(page, "fresh"); return
         except Exception:
             pass
     raise RuntimeError("문제 생성 페이지로 이동하지 못했습니다. 사이트 메뉴/레이아웃이 변경된 듯합니다.")
 
+# ===================== 로그인 세션 관리 =====================
+_PAGE_SESSION = {}  # 페이지 → 그 페이지가 속한 Session
+
+def load_accounts(ent_id=None, ent_pw=None):
+    """ACCOUNTS_PATH가 있으면 그 계정 목록, 없으면 기본 계정 하나(세션 파일 STORAGE_PATH)."""
+    if not os.path.exists(ACCOUNTS_PATH):
+        return [{"id": ent_id, "pw": ent_pw, "storage": STORAGE_PATH}]
+    with open(ACCOUNTS_PATH, encoding="utf-8") as f:
+        raw = json.load(f)
+    accounts = []
+    for i, a in enumerate(raw, 1):
+        pw = a.get("pw") or (os.getenv(a["pw_env"]) if a.get("pw_env") else None)
+        if not a.get("id") or not pw:
+            raise RuntimeError(f"{ACCOUNTS_PATH}의 {i}번째 계정에 id/pw(또는 pw_env)가 없습니다.")
+        accounts.append({"id": a["id"], "pw": pw,
+                         "storage": a.get("storage") or (STORAGE_PATH if i == 1 else f"geni_storage_{i}.json")})
+    if not accounts:
+        raise RuntimeError(f"{ACCOUNTS_PATH}에 계정이 없습니다.")
+    return accounts
+
+def auth_expiry(state):
+    """
+    로그인의 가장 이른 만료 시각(epoch): 사이트 HttpOnly 쿠키의 만료와 localStorage 토큰(JWT exp) 중 이른 쪽.
+    분석용 쿠키는 보통 자바스크립트에서 쓰므로 HttpOnly 쿠키만 본다. 둘 다 모르면 None.
+    """
+    host = urlsplit(UPLOAD_URL).hostname or ""
+    times = [c["expires"] for c in state.get("cookies", [])
+             if c.get("httpOnly") and c.get("expires", -1) > 0 and host.endswith(c.get("domain", "").lstrip("."))]
+    token_exp = api_engine.token_expiry(api_engine.token_from_state(state))
+    if token_exp is not None:
+        times.append(token_exp)
+    return min(times, default=None)
+
+async def check_session(context):
+    """
+    세션 확인용 가벼운 요청 1회. 사이트는 localStorage 토큰으로 인증하므로, 토큰과 geni_api.json의
+    categories 엔드포인트가 있으면 토큰을 실은 API 호출로 확인한다. 없으면 화면 없이 UPLOAD_URL을 GET
+    (리다이렉트는 따라가지 않음). 토큰이 JWT면 exp가 지났을 때 요청 없이 만료로 본다.
+    (True, None)=유효, (False, 로그인 주소 또는 None)=만료, (None, None)=확인 불가(네트워크 오류 등).
+    """
+    try:
+        state = await context.storage_state()
+    except Exception:
+        return None, None
+    token = api_engine.token_from_state(state)
+    token_exp = api_engine.token_expiry(token)
+    if token_exp is not None and token_exp <= time.time():
+        return False, None
+    try:
+        eps = api_engine.load_endpoints()
+    except Exception:
+        eps = None
+    try:
+        if token and eps and eps.get("categories"):
+            ep = eps["categories"]
+            resp = await context.request.fetch(urljoin(api_engine.API_BASE, ep["path"]), method=ep.get("method", "GET"),
+                                               headers=api_engine.auth_headers(eps, token),
+                                               max_redirects=0, timeout=10000)
+            if resp.status in (401, 403):
+                return False, None
+            return (True, None) if resp.ok else (None, None)
+        resp = await context.request.get(UPLOAD_URL, max_redirects=0, timeout=10000)
+    except Exception:
+        return None, None
+    location = resp.headers.get("location") or ""
+    if 300 <= resp.status < 400:
+        return ("login" not in location.lower()), (urljoin(UPLOAD_URL, location) if "login" in location.lower() else None)
+    if resp.status in (401, 403):
+        return False, None
+    if not resp.ok:
+        return None, None
+    if re.search(r"""type=["']?password""", await resp.text(), re.I):  # 주소 그대로 로그인 화면을 내주는 경우
+        return False, resp.url
+    return True, None
+
+class Session:
+    """
+    계정 하나의 로그인 세션 = 브라우저 컨텍스트 + 세션 파일. 같은 컨텍스트의 페이지는 쿠키를 공유한다.
+    컨텍스트는 처음 쓸 때 만들고, 그때 가벼운 요청으로 세션 파일을 확인해 만료됐으면 바로 로그인 화면으로 간다.
+    """
+
+    def __init__(self, browser, account, lean=LEAN, capture=False):
+        self.browser, self.lean, self.capture = browser, lean, capture
+        self.user, self.pw, self.storage = account["id"], account["pw"], account["storage"]
+        self.context = None
+        self.checked_at, self.logged_in_at, self.expires_at = 0.0, None, None
+        self._lock = asyncio.Lock()  # 같은 계정의 워커들이 컨텍스트 열기/세션 확인/재로그인을 한 번만 하도록
+
+    @property
+    def label(self):
+        return f"[{self.user or os.getenv('GENI_ID') or '기본 계정'}]"
+
+    async def _open_context(self):
+        self.context = await new_session_context(self.browser, self.storage, self.lean)
+        if self.capture:
+            api_engine.start_capture(self.context)
+        if os.path.exists(self.storage):
+            with open(self.storage, encoding="utf-8") as f:
+                self.expires_at = auth_expiry(json.load(f))
+
+    async def _page(self):
+        page = await self.context.new_page()
+        _PAGE_SESSION[page] = self
+        page.on("close", lambda _: _PAGE_SESSION.pop(page, None))
+        return page
+
+    async def new_page(self):
+        """이 세션의 문제 생성 페이지를 새로 연다(필요하면 로그인)."""
+        async with self._lock:
+            first = self.context is None
+            if first:
+                await self._open_context()
+            page = await self._page()
+            if first:
+                with phase("session_check"):
+                    valid, login_url = await check_session(self.context)
+                self.checked_at = time.time()
+                if valid is False:
+                    print(f"[*] {self.label} 저장된 세션이 만료됨 → 바로 로그인")
+                    await self.login(page, login_url)
+                    return page
+        if not await goto_create_page(page):
+            await try_login_if_needed(page, self.user, self.pw)
+            await reach_create_page(page, self.user, self.pw)
+        return page
+
+    async def warm_page(self):
+        """
+        로그인 없이 할 수 있는 데까지만 미리 연다: 세션이 유효하면 문제 생성 페이지,
+        만료됐으면 로그인 화면(아이디/비밀번호는 [실행] 때 받는다).
+        """
+        async with self._lock:
+            if self.context is None:
+                await self._open_context()
+            page = await self._page()
+            with phase("session_check"):
+                valid, login_url = await check_session(self.context)
+            self.checked_at = time.time()
+        if valid is False:
+            await page.goto(login_url or UPLOAD_URL, wait_until="load")
+        else:
+            await goto_create_page(page)
+        return page
+
+    async def login(self, page, login_url=None):
+        mark_page(page, "dirty")
+        await page.goto(login_url or UPLOAD_URL, wait_until="load")
+        await page.wait_for_load_state("networkidle")
+        await try_login_if_needed(page, self.user, self.pw)
+        await reach_create_page(page, self.user, self.pw)
+        self.logged_in_at = time.time()
+        await self.save()
+
+    async def save(self):
+        """세션 파일 갱신(세트 하나가 저장될 때마다)."""
+        if self.context is not None:
+            state = await self.context.storage_state(path=self.storage)
+            self.expires_at = auth_expiry(state)
+
+    def _expiring(self, now):
+        if self.expires_at is None:
+            return False
+        margin = SESSION_REFRESH_MARGIN_SEC
+        if self.logged_in_at is not None:  # 쿠키 수명이 여유보다 짧으면 매 세트 재로그인하지 않도록
+            margin = min(margin, (self.expires_at - self.logged_in_at) / 2)
+        return self.expires_at - now < margin
+
+    async def refresh_if_needed(self, page, force=False):
+        """
+        주기적으로(또는 로그인 만료가 가까우면) 세션을 가볍게 확인하고, 만료됐거나 곧 만료되면 미리 다시 로그인.
+        같은 계정의 워커들이 동시에 불러도 잠금 뒤에 다시 판단하므로 확인/재로그인은 한 번만 한다.
+        다시 로그인했으면 page를 dirty로 두어 다음 단계에서 새 토큰으로 다시 열게 하고 True.
+        """
+        async with self._lock:
+            now = time.time()
+            expiring = self._expiring(now)
+            if not (force or expiring or now - self.checked_at >= SESSION_CHECK_SEC):
+                return False
+            self.checked_at = now
+            with phase("session_check"):
+                valid, login_url = await check_session(self.context)
+            if valid is not False and not expiring:
+                return False
+            print(f"[*] {self.label} 세션 {'만료' if valid is False else '만료 임박'} → 다시 로그인")
+            await self._relogin(login_url)
+        mark_page(page, "dirty")
+        return True
+
+    async def _relogin(self, login_url=None):
+        """
+        임시 컨텍스트에서 로그인한 뒤 받은 쿠키/토큰만 이 세션의 컨텍스트에 덮어쓴다.
+        같은 컨텍스트에서 OCR 대기·저장 중인 다른 페이지의 쿠키를 지우지 않기 위해서다.
+        """
+        temp = await self.browser.new_context()
+        try:
+            page = await temp.new_page()
+            await page.goto(login_url or UPLOAD_URL, wait_until="load")
+            await page.wait_for_load_state("networkidle")
+            await try_login_if_needed(page, self.user, self.pw)
+            if "login" in page.url.lower():
+                raise RuntimeError(f"{self.label} 다시 로그인하지 못했습니다.")
+            state = await temp.storage_state()
+        finally:
+            await temp.close()
+        await self.context.add_cookies(state["cookies"])
+        origins = [o for o in state.get("origins", []) if o.get("localStorage")]
+        if origins:  # localStorage는 출처별이라, 빈 문서를 띄운 보조 페이지에서 옮겨 적는다
+            helper = await self.context.new_page()
+            try:
+                await helper.route("**/__geni_blank", lambda route: route.fulfill(body="", content_type="text/html"))
+                for o in origins:
+                    await helper.goto(o["origin"].rstrip("/") + "/__geni_blank")
+                    await helper.evaluate("items => items.forEach(i => localStorage.setItem(i.name, i.value))",
+                                          o["localStorage"])
+            finally:
+                await helper.close()
+        self.logged_in_at = time.time()
+        await self.save()
+
+class SessionPool:
+    """
+    계정별 Session 모음. 브라우저는 하나만 띄우고 계정마다 컨텍스트를 나눈다.
+    for_worker(k)로 동시 작업(워커)을 계정에 돌아가며 배정해 한 로그인에 몰리지 않게 한다.
+    """
+
+    def __init__(self, browser, accounts, lean=LEAN, capture=False):
+        self.browser = browser
+        self.sessions = [Session(browser, a, lean, capture) for a in accounts]
+        if len(self.sessions) > 1:
+            print(f"▶ 계정 {len(self.sessions)}개로 작업 분산 ({ACCOUNTS_PATH})")
+
+    @classmethod
+    async def launch(cls, p, accounts, headless=HEADLESS, lean=LEAN, capture=False):
+        """브라우저를 띄우고 계정별 세션 모음을 만든다(컨텍스트는 처음 쓸 때)."""
+        return cls(await launch_browser(p, headless), accounts, lean, capture)
+
+    def for_worker(self, k):
+        return self.sessions[k % len(self.sessions)]
+
+    async def save_all(self):
+        for s in self.sessions:
+            await s.save()
+
+    async def close(self):
+        """세션 파일을 남기고 브라우저를 닫는다."""
+        if self.browser.is_connected():
+            await self.save_all()
+            await self.browser.close()
+
+# ===================== 카테고리 카탈로그 =====================
+# {"fetched_at": 초, "complete": API로 전체를 받았는지, "tree": {이름: {하위...}}}
+# API(geni_api.json의 categories)로 전체 트리를 받거나, 없으면 필요한 경로만 화면에서 훑어 합쳐 둔다.
+_CATALOG = {"data": None}
+
+def load_catalog():
+    """캐시가 있고 CATEGORY_TTL_SEC 안이면 반환, 아니면 None."""
+    try:
+        with open(CATEGORY_CACHE_PATH, encoding="utf-8") as f:
+            cat = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cat.get("fetched_at", 0) > CATEGORY_TTL_SEC:
+        return None
+    return cat
+
+def save_catalog(cat):
+    with open(CATEGORY_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cat, f, ensure_ascii=False, indent=2)
+
+def path_in_tree(tree, path) -> bool:
+    node = tree
+    for name in path:
+        if name not in node:
+            return False
+        node = node[name]
+    return True
+
+async def prepare_catalog(paths, pw, refresh=False):
+    """
+    업로드 전에 카테고리 트리를 준비. 캐시 → API 순으로 시도하고,
+    여전히 확인 못 한 경로 목록을 함께 반환(→ 브라우저에서 scrape_category_paths).
+    pw: API 호출에 쓸 비동기 Playwright 드라이버(AsyncUploader.driver()).
+    """
+    cat = None if refresh else load_catalog()
+    if cat is None or not cat.get("complete"):
+        try:
+            eps = api_engine.load_endpoints()
+            tree = await api_engine.fetch_categories(pw, eps, STORAGE_PATH) if eps else None
+        except Exception as e:
+            print(f"[!] 카테고리 목록 API 실패({e}) → 화면에서 확인")
+            tree = None
+        if tree:
+            cat = {"fetched_at": time.time(), "complete": True, "tree": tree}
+            save_catalog(cat)
+            print(f"[*] 카테고리 목록 갱신(API): 1단계 {len(tree)}개")
+    if cat is None:
+        cat = {"fetched_at": time.time(), "complete": False, "tree": {}}
+    _CATALOG["data"] = cat
+    missing = [] if cat.get("complete") else [pth for pth in paths if not path_in_tree(cat["tree"], pth)]
+    return cat, missing
+
+_SIBLINGS_JS = """
+el => {
+  let n = el;
+  for (let i = 0; i < 4 && n.parentElement; i++) {
+    const p = n.parentElement;
+    if (p.children.length > 1)
+      return Array.from(p.children).map(c => (c.innerText || c.textContent || '').trim()).filter(Boolean);
+    n = p;
+  }
+  return [(el.textContent || '').trim()];
+}
+"""
+
+async def scrape_category_paths(page, paths, cat, log=print):
+    """
+    확인 못 한 경로만 화면에서 한 단계씩 눌러 보며 단계별 선택지(형제 항목)를 트리에 합친다.
+    업로드는 하지 않으며, 끝나면 페이지는 dirty로 두어 다음 세트가 새로 연다.
+    """
+    log(f"[*] 카테고리 확인(화면): {len(paths)}개 경로")
+    for path in paths:
+        await reach_create_page(page, None, None)
+        mark_page(page, "dirty")
+        node, before = cat["tree"], 0
+        for depth, name in enumerate(path):
+            loc = _category_locator(page, name, before)
+            try:
+                await loc.wait_for(state="visible", timeout=CATEGORY_WAIT_MS)
+            except Exception:
+                break  # 이 단계에 없는 이름 → check_category_paths가 알려 줌
+            for sib in await loc.evaluate(_SIBLINGS_JS):
+                node.setdefault(sib, {})
+            node.setdefault(name, {})
+            before = await _count_next_level(page, path, depth)
+            await loc.click()
+            node = node[name]
+    save_catalog(cat)  # fetched_at은 그대로: 합친 경로 때문에 예전 경로의 유효 기간이 늘어나지 않도록
+
+def check_category_paths(jobs, cat):
+    """모든 작업의 카테고리 경로를 업로드 전에 검사. 틀린 폴더가 있으면 비슷한 이름과 함께 ValueError."""
+    bad = {}
+    for job in jobs:
+        path = tuple(job["categories"])
+        if path in bad or path_in_tree(cat["tree"], path):
+            continue
+        node, depth = cat["tree"], 0
+        while depth < len(path) and path[depth] in node:
+            node, depth = node[path[depth]], depth + 1
+        hint = difflib.get_close_matches(path[depth], list(node), n=3, cutoff=0.4)
+        bad[path] = (job["folder"], depth, hint)
+    if not bad:
+        return
+    lines = ["카테고리 경로가 사이트에 없습니다(업로드 전 중단):"]
+    for path, (folder, depth, hint) in bad.items():
+        lines.append(f"  - {folder}: {' > '.join(path)} → {depth + 1}단계 '{path[depth]}' 없음"
+                     + (f" (혹시: {', '.join(hint)})" if hint else ""))
+    raise ValueError("\n".join(lines))
+
+# 단계마다 같은 이름이 다시 나올 수 있다(예: 과목 > 단원 > 같은 이름의 소단원). 앞 단계의 항목은 이미 보이므로
+# 그럴 때만 클릭 전에 다음 단계 이름의 개수를 세어 두고, 그 다음 순번(클릭으로 새로 그려진 항목)을 기다린다.
+def _category_locator(page, name, before=0):
+    return page.get_by_text(name, exact=True).nth(before)
+
+def _repeats_earlier(tree, path, depth):
+    """path[depth + 1]이 1~depth+1단계 선택지에 이미 있는지. 카탈로그가 모르는 경로면 None."""
+    node, nxt = tree, path[depth + 1]
+    for name in path[:depth + 1]:
+        if nxt in node:
+            return True
+        if name not in node:
+            return None
+        node = node[name]
+    return False
+
+async def _count_next_level(page, path, depth, tree=None):
+    """
+    path[depth]를 클릭하기 전, 다음 단계 이름이 이미 화면에 몇 개 있는지.
+    카탈로그(tree)로 앞 단계에 같은 이름이 없다고 확인되면 세지 않고 0(왕복 1회 절약).
+    """
+    if depth + 1 >= len(path):
+        return 0
+    if tree is not None and _repeats_earlier(tree, path, depth) is False:
+        return 0
+    return await page.get_by_text(path[depth + 1], exact=True).count()
+
+async def select_categories(page, categories, log=print):
+    """단계별로 클릭. 고정 sleep 대신 다음 단계 항목이 그려질 때까지만 기다린다."""
+    tree = (_CATALOG["data"] or {}).get("tree")
+    before = 0
+    for depth, cat in enumerate(categories):
+        loc = _category_locator(page, cat, before)
+        await loc.wait_for(state="visible", timeout=CATEGORY_WAIT_MS)  # 이전 단계 클릭 후 이 단계가 뜰 때까지
+        before = await _count_next_level(page, categories, depth, tree)
+        await loc.click()
+        log(f"  - '{cat}' 클릭")
+
 # ===================== OCR 대기 + 저장 =====================
 BUSY_REGEX = re.compile(r"(OCR|변환|추출|처리 중|분석 중)", re.I)
 
-def _ocr_done_signal(page) -> bool:
-    if page.get_by_role("button", name=re.compile("저장하기|저장|완료")).count() > 0:
+async def _ocr_done_signal(page) -> bool:
+    if await page.get_by_role("button", name=re.compile("저장하기|저장|완료")).count() > 0:
         return True
-    if page.locator("text=문항").count() > 0:
+    if await page.locator("text=문항").count() > 0:
         return True
-    if page.locator("[data-testid='question-list'], .question-list").count() > 0:
+    if await page.locator("[data-testid='question-list'], .question-list").count() > 0:
         return True
     return False
 
-def wait_for_ocr_finish(page, timeout_ms=OCR_TIMEOUT_MS):
-    start = time.time()
+async def ocr_finished(page) -> bool:
+    """OCR 완료 여부를 한 번만 확인(블로킹 대기 없음)."""
+    if await _ocr_done_signal(page):
+        return True
+    body = ""
     try:
-        page.get_by_text("문제 설정").first.wait_for(state="visible", timeout=120000)
+        body = (await page.inner_text("body"))[:200000]
     except:
         pass
-    while True:
+    return bool(body) and not BUSY_REGEX.search(body)
+
+# ----- 이벤트 기반 감지: DOM MutationObserver + OCR 상태 응답 -----
+OCR_STATUS_URL_REGEX = re.compile(r"ocr|convert|extract", re.I)  # OCR 상태 XHR 주소(geni_api.json의 ocr_status가 없을 때)
+OCR_DONE_STATES = {"DONE", "COMPLETE", "COMPLETED", "FINISHED"}  # SUCCESS/END는 요청 자체의 성공일 수 있어 제외
+OCR_BINDING = "__geniOcrEvent"
+
+# 페이지 안에서 DOM 변화를 지켜보다가 '문제 설정' 진입(stage:ocr) / 완료(dom:...)를 파이썬에 알린다.
+# 무장 상태는 sessionStorage에 두어 같은 출처 안에서 페이지가 바뀌어도 유지된다.
+OCR_OBSERVER_JS = """
+(() => {
+  if (window.__geniOcrObserver) return;
+  const DONE_BTN = /저장하기|저장|완료/;
+  const KEY = '__geniOcrStage';
+  const send = (sig) => { try { window.%s(sig); } catch (e) {} };
+  let timer = null;
+  const check = () => {
+    timer = null;
+    const stage = sessionStorage.getItem(KEY);
+    if (!stage || !document.body) return;
+    if (stage === 'armed') {
+      if (!document.body.textContent.includes('문제 설정')) return;
+      sessionStorage.setItem(KEY, 'ocr');
+      send('stage:ocr');
+    }
+    if (document.querySelector("[data-testid='question-list'], .question-list")) {
+      sessionStorage.removeItem(KEY); send('dom:question-list'); return;
+    }
+    for (const b of document.querySelectorAll("button, [role='button']")) {
+      if (!b.disabled && DONE_BTN.test(b.textContent || '')) {
+        sessionStorage.removeItem(KEY); send('dom:save-button'); return;
+      }
+    }
+  };
+  const obs = new MutationObserver(() => { if (!timer) timer = setTimeout(check, 50); });
+  const start = () => obs.observe(document.documentElement,
+    {childList: true, subtree: true, attributes: true, characterData: true});
+  if (document.documentElement) start(); else document.addEventListener('DOMContentLoaded', start);
+  window.__geniOcrObserver = obs;
+  window.__geniOcrCheck = check;
+})();
+""" % OCR_BINDING
+
+def _ocr_state_from_json(data):
+    """
+    OCR 상태 응답(JSON)에서 상태 문자열을 꺼냄. data 아래 → 최상위 순으로, OCR 전용 키(ocrStatus 등)를
+    일반 키(status 등)보다 먼저 본다({"status": "SUCCESS", "data": {"ocrStatus": "RUNNING"}} 같은 포장 응답).
+    """
+    dicts = [d for d in (data.get("data") if isinstance(data, dict) else None, data) if isinstance(d, dict)]
+    for keys in (("ocrStatus", "ocrState"), ("status", "state")):
+        for d in dicts:
+            for key in keys:
+                if isinstance(d.get(key), str):
+                    return d[key].upper()
+    for d in dicts:
+        if d.get("progress") in (100, "100"):
+            return "COMPLETE"
+    return None
+
+_OCR_STATUS = {"loaded": False, "regex": None, "done": None}
+
+def ocr_status_matcher():
+    """
+    OCR 상태 XHR을 알아보는 (정규식, 완료 상태 집합). geni_api.json에 ocr_status가 있으면 그 주소와 done 목록,
+    없으면 OCR_STATUS_URL_REGEX / OCR_DONE_STATES.
+    """
+    if not _OCR_STATUS["loaded"]:
         try:
-            page.wait_for_load_state("networkidle", timeout=8000)
-        except:
-            pass
-        if _ocr_done_signal(page):
-            return
-        body = ""
+            ep = (api_engine.load_endpoints() or {}).get("ocr_status")
+        except Exception:
+            ep = None
+        if ep and ep.get("path"):
+            path = re.escape(ep["path"]).replace(re.escape("{id}"), r"[^/?#]+")
+            _OCR_STATUS["regex"] = re.compile(path + r"(?:[?#]|$)")
+            _OCR_STATUS["done"] = {str(v).upper() for v in ep.get("done", [])} or OCR_DONE_STATES
+        _OCR_STATUS["loaded"] = True
+    return _OCR_STATUS["regex"] or OCR_STATUS_URL_REGEX, _OCR_STATUS["done"] or OCR_DONE_STATES
+
+class OcrWatcher:
+    """
+    페이지 하나의 OCR 진행/완료 신호를 푸시로 받아 두는 객체. signal에 어떤 신호로 끝났는지 기록하고,
+    done(asyncio.Event)으로 기다리는 쪽을 깨운다.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.armed = False
+        self.started = False
+        self.signal = None
+        self.armed_at = 0.0
+        self.done = asyncio.Event()
+
+    async def install(self):
+        await self.page.expose_binding(OCR_BINDING, self._on_dom)
+        await self.page.add_init_script(OCR_OBSERVER_JS)
+        self.page.on("response", self._on_response)
         try:
-            body = page.inner_text("body")[:200000]
-        except:
+            await self.page.evaluate(OCR_OBSERVER_JS)  # 이미 열려 있는 문서에도 설치
+        except Exception:
             pass
-        if body and not BUSY_REGEX.search(body):
-            return
-        if (time.time() - start) * 1000 > timeout_ms:
-            raise TimeoutError("OCR 작업이 제한 시간 내에 끝나지 않았습니다.")
-        time.sleep(1.2)
 
-def wait_until_enabled(locator, timeout_ms=60000):
-    start = time.time()
-    while time.time() - start < timeout_ms/1000:
+    async def arm(self):
+        """[다음] 클릭 직후 호출: 이후 들어오는 신호를 이번 세트의 것으로 본다."""
+        self.armed, self.started, self.signal = True, False, None
+        self.armed_at = time.time()
+        self.done.clear()
         try:
-            if locator.is_enabled(): return True
-        except:
+            await self.page.evaluate("sessionStorage.setItem('__geniOcrStage', 'armed');"
+                                     "window.__geniOcrCheck && window.__geniOcrCheck();")
+        except Exception:
             pass
-        time.sleep(0.3)
-    return False
 
-def click_save(page):
-    candidates = [
-        "button:has-text('저장하기')",
-        "button:has-text('저장')",
-        "button:has-text('완료')",
-    ]
-    for sel in candidates:
+    def fire(self, signal):
+        if self.armed and not self.signal:
+            self.signal = signal
+            self.armed = False
+            self.done.set()
+
+    def _on_dom(self, source, sig):
+        if sig == "stage:ocr":
+            self.started = True
+        else:
+            self.fire(sig)
+
+    async def _on_response(self, resp):
+        if not self.armed or self.signal:
+            return
+        if resp.request.resource_type not in ("xhr", "fetch"):
+            return
+        regex, done_states = ocr_status_matcher()
+        if not regex.search(resp.url):
+            return
         try:
-            btn = page.locator(sel)
-            if btn.count():
-                if not wait_until_enabled(btn.first, 120000):
-                    pass
-                btn.first.click()
-                try:
-                    page.wait_for_load_state("networkidle", timeout=15000)
-                except:
-                    pass
-                return
-        except:
-            continue
-    btn = page.get_by_role("button", name=re.compile("저장하기|저장|완료"))
-    if btn.count():
-        btn.first.click()
+            state = _ocr_state_from_json(await resp.json())
+        except Exception:
+            return
+        if state in done_states:
+            # [다음] 직후 업로드/변환 요청의 완료 응답을 OCR 완료로 착각하지 않도록,
+            # '문제 설정' 진입이나 진행 중 응답을 본 뒤에만 완료로 받는다
+            if self.started:
+                self.fire(f"network:{state}")
+        elif state is not None:
+            self.started = True
+
+    def fallback_allowed(self) -> bool:
+        """기존 휴리스틱은 '문제 설정' 진입이 확인됐거나 유예 시간이 지난 뒤에만 쓴다."""
+        return self.started or (time.time() - self.armed_at) * 1000 > OCR_START_GRACE_MS
+
+_OCR_WATCHERS = {}
+
+async def get_ocr_watcher(page) -> OcrWatcher:
+    """페이지마다 감시자 하나(바인딩은 페이지당 한 번만 노출 가능)."""
+    w = _OCR_WATCHERS.get(page)
+    if w is None:
+        w = _OCR_WATCHERS[page] = OcrWatcher(page)
+        page.on("close", lambda _: _OCR_WATCHERS.pop(page, None))
+        await w.install()
+    return w
+
+async def check_ocr_fallback(watcher):
+    """이벤트 신호 없이 OCR_FALLBACK_SEC가 지났을 때 기존 휴리스틱으로 한 번 확인."""
+    if not watcher.signal and watcher.fallback_allowed() and await ocr_finished(watcher.page):
+        watcher.fire("fallback:heuristic")
+
+async def wait_for_ocr_finish(page, timeout_ms=OCR_TIMEOUT_MS):
+    """OCR 완료 신호를 기다리고 그 이름을 반환. 신호 없이 OCR_FALLBACK_SEC가 지날 때마다 휴리스틱으로 확인."""
+    watcher = await get_ocr_watcher(page)
+    if not watcher.armed and not watcher.signal:
+        await watcher.arm()
+    deadline = time.time() + timeout_ms / 1000
+    while not watcher.signal:
+        left = deadline - time.time()
+        if left <= 0:
+            raise TimeoutError(f"OCR 작업이 제한 시간({timeout_ms / 60000:.0f}분) 내에 끝나지 않았습니다.")
         try:
-            page.wait_for_load_state("networkidle", timeout=15000)
-        except:
-            pass
-        return
-    raise RuntimeError("저장 버튼을 찾지 못했습니다.")
+            await asyncio.wait_for(watcher.done.wait(), timeout=min(OCR_FALLBACK_SEC, left))
+        except asyncio.TimeoutError:
+            await check_ocr_fallback(watcher)
+    return watcher.signal
+
+async def wait_until_enabled(locator, timeout_ms=60000, info=None):
+    """locator가 활성화될 때까지 기다림(폴링 대신 Playwright의 조건 대기). 시간 안에 안 되면 False."""
+    from playwright.async_api import expect
+    start = time.time()
+    try:
+        await expect(locator).to_be_enabled(timeout=timeout_ms)
+        return True
+    except AssertionError:
+        return False
+    finally:
+        if info is not None:
+            info["enable_wait_ms"] = round((time.time() - start) * 1000)
 
-def process_one_set(page, base, problem_file: Path, answer_file: Path, categories):
-    """한 세트(문제/해설) 업로드 → 다음 → OCR 대기 → (5초) → 저장."""
-    reach_create_page(page, None, None)
+async def click_save(page, info=None):
+    info = {} if info is None else info
+    btn = await resolve(page, "save_button", info)
+    if btn is None:
+        raise RuntimeError("저장 버튼을 찾지 못했습니다.")
+    if not await wait_until_enabled(btn.first, 120000, info):
+        pass
+    await btn.first.click()
+    try:
+        await page.wait_for_load_state("networkidle", timeout=15000)
+    except:
+        pass
+
+async def submit_one_set(page, base, problem_file: Path, answer_file: Path, categories, log=print):
+    """한 세트의 앞부분: 문제지명 → 카테고리 → 파일 → [다음]. 이후 OCR은 서버가 진행."""
+    with phase("reach_create_page", base):
+        await reach_create_page(page, None, None)
+    mark_page(page, "dirty")
 
     # 1) 문제지명 입력
-    name_input = page.locator("input[placeholder*='학습지명']")
-    if name_input.count() == 0:
-        name_input = page.locator(
-            "xpath=//label[contains(., '학습지명') or contains(., '문제지명')]/following::input[1]"
-        )
-    if name_input.count() == 0:
-        raise RuntimeError("학습지명 입력 칸을 찾지 못했습니다.")
-    name_input.first.click()
-    name_input.first.fill(base)
+    with phase("name_input", base) as info:
+        name_input = await resolve(page, "name_input", info)
+        if name_input is None:
+            raise RuntimeError("학습지명 입력 칸을 찾지 못했습니다.")
+        await name_input.first.click()
+        await name_input.first.fill(base)
 
     # 2) 카테고리 선택
-    print(f"[*] 카테고리 선택: {' > '.join(categories)}")
-    for cat in categories:
-        loc = page.get_by_text(cat, exact=True).first
-        loc.wait_for(state="visible", timeout=10000)
-        loc.click()
-        print(f"  - '{cat}' 클릭")
-        time.sleep(0.5)
+    log(f"[*] 카테고리 선택: {' > '.join(categories)}")
+    with phase("categories", base, levels=len(categories)):
+        await select_categories(page, categories, log=log)
 
     # 3) 파일 업로드
-    file_inputs = page.locator("input[type='file']")
-    file_inputs.nth(0).set_input_files(str(problem_file))
-    file_inputs.nth(1).set_input_files(str(answer_file))
+    with phase("file_transfer", base, bytes=problem_file.stat().st_size + answer_file.stat().st_size):
+        file_inputs = page.locator("input[type='file']")
+        await file_inputs.nth(0).set_input_files(str(problem_file))
+        await file_inputs.nth(1).set_input_files(str(answer_file))
 
     # 4) [다음] 클릭
-    next_btn = page.get_by_role("button", name=re.compile("^다음$"))
-    if not wait_until_enabled(next_btn, timeout_ms=120000):
-        print("경고: [다음] 버튼이 아직 비활성입니다. 그래도 클릭 시도합니다.")
-    next_btn.click()
-
-    # 5) OCR 완료 대기 → 5초 대기 → 저장
-    print(f"[*] {base} : OCR 변환 대기 중...")
-    wait_for_ocr_finish(page, timeout_ms=OCR_TIMEOUT_MS)
-    print(f"[✓] {base} : OCR 완료 감지. {SAVE_DELAY_SEC}초 대기 후 저장합니다...")
-    time.sleep(SAVE_DELAY_SEC)
-    click_save(page)
-    print(f"[✓] {base} : 저장 완료.")
-
-def run(folder: Path, ent_id=None, ent_pw=None, log_queue=None):
+    with phase("next_click", base) as info:
+        next_btn = await resolve(page, "next_button", info)
+        if next_btn is None:  # 아직 안 그려졌으면 기본 전략으로 기다림
+            next_btn = SELECTOR_STRATEGIES["next_button"][0][1](page)
+        next_btn = next_btn.first
+        if not await wait_until_enabled(next_btn, timeout_ms=120000, info=info):
+            log("경고: [다음] 버튼이 아직 비활성입니다. 그래도 클릭 시도합니다.")
+        watcher = await get_ocr_watcher(page)
+        await next_btn.click()
+        await watcher.arm()
+
+async def process_one_set(page, base, problem_file: Path, answer_file: Path, categories, log=print,
+                          on_phase=None, ocr_timeout_ms=OCR_TIMEOUT_MS):
+    """한 세트(문제/해설) 업로드 → 다음 → OCR 대기 → (5초) → 저장. on_phase(phase, page)로 진행 단계 통지."""
+    on_phase = on_phase or (lambda phase, page: None)
+    await submit_one_set(page, base, problem_file, answer_file, categories, log=log)
+    on_phase("submitted", page)
+    await finish_one_set(page, base, log=log, on_phase=on_phase, ocr_timeout_ms=ocr_timeout_ms)
+
+async def finish_one_set(page, base, log=print, on_phase=None, ocr_timeout_ms=OCR_TIMEOUT_MS):
+    """[다음] 이후: OCR 완료 대기 → (5초) → 저장. 기다리는 동안 같은 루프의 다른 페이지는 계속 진행된다."""
+    on_phase = on_phase or (lambda phase, page: None)
+    log(f"[*] {base} : OCR 변환 대기 중...")
+    with phase("ocr_wait", base, timeout_ms=ocr_timeout_ms) as info:
+        signal = info["signal"] = await wait_for_ocr_finish(page, timeout_ms=ocr_timeout_ms)
+    on_phase("ocr_done", page)
+    log(f"[✓] {base} : OCR 완료 감지({signal}). {SAVE_DELAY_SEC}초 대기 후 저장합니다...")
+    with phase("save_delay", base):
+        await asyncio.sleep(SAVE_DELAY_SEC)
+    with phase("click_save", base) as info:
+        await click_save(page, info)
+    on_phase("saved", page)
+    log(f"[✓] {base} : 저장 완료.")
+
+async def open_resume_page(page, url):
+    """[다음]까지 진행됐던 세트의 편집 페이지를 다시 열고 OCR 감시를 무장."""
+    mark_page(page, "dirty")
+    await page.goto(url, wait_until="load")
+    await page.wait_for_load_state("networkidle")
+    if "login" in page.url.lower():
+        raise RuntimeError("이어하기 페이지가 로그인으로 리다이렉트되었습니다.")
+    watcher = await get_ocr_watcher(page)
+    await watcher.arm()
+    watcher.started = True  # 이미 '문제 설정' 단계 이후이므로 유예 없이 확인
+
+# ===================== 사전 점검(파일 검사/지문) =====================
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"  # .docx
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # .doc, 암호 걸린 .docx
+
+STARTXREF_REGEX = re.compile(rb"startxref\s+(\d+)")
+XREF_AT_REGEX = re.compile(rb"\s*(?:xref|\d+\s+\d+\s+obj)")  # 상호참조 표 또는 상호참조 스트림 객체
+TRAILER_ROOT_REGEX = re.compile(rb"/Root\s+\d+\s+\d+\s+R")
+PAGE_REGEX = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+STREAM_REGEX = re.compile(rb"(?<!end)stream\r?\n")
+OBJSTM_MAX_BYTES = 16 * 2**20  # 객체 스트림 하나를 풀 때의 상한(압축 폭탄 방지)
+
+def _object_streams(data):
+    """PDF 1.5+의 압축 객체 스트림(/Type /ObjStm, FlateDecode)을 풀어 차례로 돌려준다. 못 푸는 것은 건너뛴다."""
+    for m in STREAM_REGEX.finditer(data):
+        head = data[data.rfind(b" obj", 0, m.start()):m.start()]  # 이 스트림 객체의 사전
+        if b"/ObjStm" not in head or b"/FlateDecode" not in head:
+            continue
+        try:
+            yield zlib.decompressobj().decompress(memoryview(data)[m.end():], OBJSTM_MAX_BYTES)
+        except zlib.error:
+            continue
+
+def _count_pdf_pages(data):
+    """/Type /Page 개수. 압축 객체 스트림 안에 있으면 풀어서 센다. 그래도 없으면 페이지 트리의 /Count."""
+    bodies = [data]
+    if b"/ObjStm" in data:
+        bodies += _object_streams(data)
+    pages = sum(len(PAGE_REGEX.findall(b)) for b in bodies)
+    if not pages:
+        pages = max((int(n) for b in bodies for n in re.findall(rb"/Count\s+(\d+)", b)), default=None)
+    return pages
+
+def _check_pdf(data):
+    """(쪽수, 문제). 서명/끝 표식과 상호참조(startxref → xref, 트레일러의 /Root)까지만 확인한다."""
+    start = data.find(PDF_MAGIC, 0, 1024)
+    if start < 0:
+        return None, "PDF 서명(%PDF-) 없음"
+    tail = data[-2048:]
+    if b"%%EOF" not in tail:
+        return None, "PDF가 잘림(%%EOF 없음)"
+    found = STARTXREF_REGEX.findall(tail)
+    if not found:
+        return None, "PDF 상호참조 위치(startxref) 없음"
+    offset = int(found[-1])
+    # 서명 앞에 쓰레기 바이트가 붙은 파일은 오프셋이 서명 기준이므로 둘 다 본다
+    xref = next((o for o in (offset, offset + start) if o < len(data) and XREF_AT_REGEX.match(data, o)), None)
+    if xref is None:
+        return None, "PDF 상호참조가 가리키는 위치가 맞지 않음(손상)"
+    if not TRAILER_ROOT_REGEX.search(data, xref):
+        return None, "PDF 트레일러에 /Root 없음(손상)"
+    if re.search(rb"/Encrypt\s*(?:<<|\d+\s+\d+\s+R)", data):
+        return None, "암호가 걸린 PDF"
+    return _count_pdf_pages(data), None
+
+def _check_docx(data):
+    if data.startswith(OLE_MAGIC):
+        if "EncryptedPackage".encode("utf-16-le") in data or _doc_encrypted(data):
+            return None, "암호가 걸린 문서"
+        return None, "DOCX가 아니라 DOC 형식(확장자 확인)"
+    if not data.startswith(ZIP_MAGIC):
+        return None, "DOCX 서명(ZIP) 없음"
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            if "word/document.xml" not in z.namelist():
+                return None, "DOCX 본문(word/document.xml) 없음"
+            bad = z.testzip()
+            if bad:
+                return None, f"DOCX 손상({bad})"
+            try:
+                m = re.search(rb"<Pages>(\d+)</Pages>", z.read("docProps/app.xml"))
+            except KeyError:
+                m = None
+            return (int(m.group(1)) if m else None), None
+    except zipfile.BadZipFile:
+        return None, "DOCX가 잘렸거나 손상됨"
+
+def _ole_stream_offset(data, name):
+    """
+    OLE(복합 문서) 파일에서 이름이 name인 스트림의 첫 섹터 위치. 못 찾으면 None.
+    디렉터리만 FAT을 따라 읽는 최소한의 해석(헤더의 DIFAT 109칸 = 약 7MB까지의 FAT)이다.
+    """
+    try:
+        sector = 1 << int.from_bytes(data[0x1E:0x20], "little")
+        at = lambda sid: (sid + 1) * sector
+        fat = []
+        for sid in struct.unpack_from("<109i", data, 0x4C):
+            if sid >= 0:
+                fat += struct.unpack_from(f"<{sector // 4}i", data, at(sid))
+        sid, seen, want = struct.unpack_from("<i", data, 0x30)[0], set(), name.encode("utf-16-le")
+        while 0 <= sid < len(fat) and sid not in seen:
+            seen.add(sid)
+            for off in range(at(sid), at(sid) + sector, 128):
+                n = int.from_bytes(data[off + 0x40:off + 0x42], "little")
+                if 2 <= n <= 64 and data[off:off + n - 2] == want:
+                    return at(struct.unpack_from("<i", data, off + 0x74)[0])
+            sid = fat[sid]
+    except (struct.error, ValueError):
+        pass
+    return None
+
+def _doc_encrypted(data):
+    """Word 97-2003 문서의 FIB 플래그: fEncrypted(0x0100) 또는 fObfuscated(0x8000)면 암호가 걸린 문서."""
+    fib = _ole_stream_offset(data, "WordDocument")
+    if fib is None or data[fib:fib + 2] != b"\xec\xa5":  # wIdent 0xA5EC
+        return False
+    return bool(int.from_bytes(data[fib + 0x0A:fib + 0x0C], "little") & 0x8100)
+
+def _check_doc(data):
+    if not data.startswith(OLE_MAGIC):
+        return None, "DOC 서명(OLE) 없음"
+    if "EncryptedPackage".encode("utf-16-le") in data or _doc_encrypted(data):
+        return None, "암호가 걸린 문서"
+    return None, None  # 쪽수는 알 수 없음 → 기본 OCR 대기
+
+def inspect_file(path: Path, digest=None) -> dict:
+    """
+    파일 하나 검사 → {"size", "pages", "error"}. error가 있으면 업로드하지 않는다.
+    digest(hashlib 객체)를 주면 읽은 내용을 pair_hash와 같은 방식으로 더한다(파일을 두 번 읽지 않도록).
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return {"size": 0, "pages": None, "error": "빈 파일(0바이트)"}
+    if size > MAX_FILE_MB * 2**20:
+        return {"size": size, "pages": None, "error": f"파일이 너무 큼({size / 2**20:.0f}MB > {MAX_FILE_MB}MB)"}
+    ext = next((s.lower() for s in reversed(path.suffixes) if s.lower() in ALLOWED_EXTS), ".pdf")
+    check = {".pdf": _check_pdf, ".docx": _check_docx, ".doc": _check_doc}[ext]
+    data = path.read_bytes()
+    if digest is not None:
+        digest.update(data)
+        digest.update(b"\0")
+    pages, error = check(data)
+    return {"size": size, "pages": pages, "error": error}
+
+def inspect_pair(problem_file: Path, answer_file: Path) -> dict:
+    """
+    문제/해설 쌍 검사(프로세스 풀에서 실행) → {"hash", "pages", "errors"}.
+    pages는 두 파일 쪽수의 합(하나라도 모르면 None), hash는 pair_hash와 같은 값.
+    """
+    errors, pages, digest = [], 0, hashlib.sha256()
+    for role, f in (("문제", problem_file), ("해설", answer_file)):
+        try:
+            r = inspect_file(f, digest)
+        except OSError as e:
+            errors.append(f"{role} 파일을 읽을 수 없음({e})"); continue
+        if r["error"]:
+            errors.append(f"{role} 파일: {r['error']}")
+        pages = None if pages is None or r["pages"] is None else pages + r["pages"]
+    if errors:
+        return {"hash": None, "pages": None, "errors": errors}
+    return {"hash": digest.hexdigest(), "pages": pages or None, "errors": []}
+
+def ocr_timeout_for(pages):
+    """문서 분량(문제+해설 쪽수)에 맞춘 OCR 최대 대기(ms). 쪽수를 모르면 OCR_TIMEOUT_MS."""
+    if not pages:
+        return OCR_TIMEOUT_MS
+    return OCR_TIMEOUT_BASE_MS + pages * OCR_TIMEOUT_PER_PAGE_MS
+
+class Preflight:
+    """
+    스캔한 모든 쌍을 프로세스 풀에서 검사(브라우저 시작/로그인과 동시에 진행).
+    results()가 처음 불릴 때 결과를 모아 불합격 세트와 이유를 출력한다.
+    """
+
+    def __init__(self, groups, workers=None):
+        self.pairs = [(folder, base, prob, ans) for folder, _, pairs in groups for base, prob, ans in pairs]
+        self.start, self.checks, self.futures = time.time(), None, {}
+        try:
+            self.pool = ProcessPoolExecutor(max_workers=workers or PREFLIGHT_WORKERS)
+            for _, _, prob, ans in self.pairs:
+                self.futures[(prob, ans)] = self.pool.submit(inspect_pair, prob, ans)
+        except (OSError, RuntimeError, BrokenProcessPool) as e:  # 프로세스를 못 띄우는 환경 → results()에서 직접 검사
+            print(f"[!] 사전 점검 프로세스 풀을 쓸 수 없어 직접 검사합니다({e})")
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def results(self) -> dict:
+        """{(문제 경로, 해설 경로): inspect_pair 결과}"""
+        if self.checks is not None:
+            return self.checks
+        self.checks = {}
+        for _, _, prob, ans in self.pairs:
+            future = self.futures.get((prob, ans))
+            try:
+                self.checks[(prob, ans)] = future.result() if future else inspect_pair(prob, ans)
+            except BrokenProcessPool:
+                self.checks[(prob, ans)] = inspect_pair(prob, ans)
+        self.close()
+        rejected = [(f, b, self.checks[(p, a)]["errors"]) for f, b, p, a in self.pairs if self.checks[(p, a)]["errors"]]
+        emit_phase("preflight", self.start, time.time(), sets=len(self.pairs), rejected=len(rejected))
+        print(f"▼ 사전 점검: {len(self.pairs)}세트 중 {len(self.pairs) - len(rejected)}세트 통과"
+              f" ({time.time() - self.start:.1f}초)")
+        for folder, base, errors in rejected:
+            print(f"  * {Path(folder).name}/{base} 제외 -> {'; '.join(errors)}")
+        return self.checks
+
+# ===================== 업로드 기록(건너뛰기/이어하기) =====================
+def pair_hash(problem_file: Path, answer_file: Path) -> str:
+    """문제/해설 파일 내용의 SHA-256 (파일명이 같아도 내용이 바뀌면 다른 값)."""
+    h = hashlib.sha256()
+    for f in (problem_file, answer_file):
+        with open(f, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b""):
+                h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+def load_ledger(path=None) -> dict:
+    """기록 파일을 끝까지 읽어 (폴더, base)별 마지막 기록을 반환. 깨진 줄은 무시."""
+    path = path or LEDGER_PATH
+    last = {}
+    if not os.path.exists(path):
+        return last
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                last[(rec["folder"], rec["base"])] = rec
+            except (ValueError, KeyError):
+                continue
+    return last
+
+def ledger_append(job, phase, url=None, path=None):
+    rec = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "folder": job["folder"], "base": job["base"], "hash": job["hash"],
+        "categories": job["categories"], "phase": phase,
+    }
+    if url:
+        rec["url"] = url
+    with open(path or LEDGER_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+def _resumable_url(url) -> bool:
+    """새 문서 생성 주소(id=0)가 아니라 서버에 만들어진 문서 주소인지."""
+    return bool(url) and "login" not in url.lower() and bool(re.search(r"[?&]id=(?!0(?:&|$))\w+", url))
+
+def plan_jobs(pairs, folder: Path, categories, force=False, ledger_path=None, checks=None):
+    """
+    기록과 비교해 작업 목록을 만든다.
+    - 같은 내용으로 이미 저장됨 → 건너뜀
+    - 같은 내용으로 [다음]까지 진행됨 → 그 문서 주소에서 이어하기
+    - 새 파일이거나 내용이 바뀜(또는 force) → 새로 업로드
+    checks(사전 점검 결과)가 있으면 그 해시/쪽수를 쓰고, 불합격한 쌍은 뺀다.
+    """
+    ledger = {} if force else load_ledger(ledger_path)
+    jobs, skipped, resumed = [], [], 0
+    for base, prob, ans in pairs:
+        check = (checks or {}).get((prob, ans))
+        if check and check["errors"]:
+            continue
+        pages = check["pages"] if check else None
+        job = {"id": str(Path(folder) / base), "folder": str(folder), "base": base, "problem": prob,
+               "answer": ans, "categories": list(categories), "hash": check["hash"] if check else pair_hash(prob, ans),
+               "resume_url": None, "pages": pages, "ocr_timeout_ms": ocr_timeout_for(pages)}
+        rec = ledger.get((job["folder"], base))
+        if rec and rec.get("hash") == job["hash"]:
+            if rec.get("phase") == "saved":
+                skipped.append(base); continue
+            if rec.get("phase") in ("submitted", "ocr_done") and _resumable_url(rec.get("url")):
+                job["resume_url"] = rec["url"]; resumed += 1
+        jobs.append(job)
+    if skipped:
+        print(f"▶ 이미 저장된 세트 {len(skipped)}개 건너뜀: {', '.join(skipped)}")
+    if resumed:
+        print(f"▶ 중단된 세트 {resumed}개는 이어서 진행")
+    return jobs
+
+def scan_groups(folder: Path, recursive=False):
+    """업로드할 폴더(들) 스캔 → [(폴더, 카테고리, 쌍 목록)]. recursive면 하위 카테고리 폴더 전체."""
+    if recursive:
+        groups = find_category_folders(folder)
+        if not groups:
+            raise FileNotFoundError(f"카테고리 규칙(1차_2차_3차)에 맞고 문제/해설 쌍이 있는 하위 폴더가 없습니다: {folder}")
+        return groups
     pairs = find_all_pairs_in_folder(folder, debug=True)
     derived_categories = infer_categories_from_folder(folder)
     print(f"▶ 적용 카테고리: {' > '.join(derived_categories)}")
+    return [(folder, derived_categories, pairs)]
+
+def plan_batch_jobs(root: Path, force=False, ledger_path=None, folders=None, checks=None):
+    """root 아래 모든 카테고리 폴더를 하나의 작업 목록으로 합치고 카테고리별 세트 수를 출력."""
+    folders = scan_groups(root, recursive=True) if folders is None else folders
+
+    jobs, per_cat = [], {}
+    print(f"▼ 일괄 스캔 결과: 폴더 {len(folders)}개")
+    for folder, cats, pairs in folders:
+        print(f"  - {folder.relative_to(root) if folder != root else folder.name}: {len(pairs)}세트")
+        folder_jobs = plan_jobs(pairs, folder, cats, force=force, ledger_path=ledger_path, checks=checks)
+        key = " > ".join(cats)
+        total, todo = per_cat.get(key, (0, 0))
+        per_cat[key] = (total + len(pairs), todo + len(folder_jobs))
+        jobs.extend(folder_jobs)
+
+    print("▼ 카테고리별 세트 수 (전체 / 이번에 업로드)")
+    for key, (total, todo) in sorted(per_cat.items()):
+        print(f"  - {key}: {total} / {todo}")
+    print(f"▶ 전체 업로드 대상: {len(jobs)}세트")
+    return jobs
+
+def _plan_scanned(groups, root: Path, recursive, force=False, checks=None):
+    if recursive:
+        return plan_batch_jobs(root, force=force, folders=groups, checks=checks)
+    folder, cats, pairs = groups[0]
+    return plan_jobs(pairs, folder, cats, force=force, checks=checks)
+
+def _may_need_upload(groups, force=False, ledger_path=None) -> bool:
+    """이름만 보고 저장 기록이 없는 세트가 있는지(내용 비교는 사전 점검 해시로 나중에)."""
+    if force:
+        return True
+    ledger = load_ledger(ledger_path)
+    return any(ledger.get((str(folder), base), {}).get("phase") != "saved"
+               for folder, _, pairs in groups for base, _, _ in pairs)
+
+def _ledger_hook(job, ledger_path=None):
+    """단계마다 기록을 남기고, 서버에 문서가 생긴 뒤의 주소는 재시도 때 이어 하도록 job["progress_url"]에 둔다."""
+    def hook(phase, page):
+        ledger_append(job, phase, url=page.url, path=ledger_path)
+        if phase in ("submitted", "ocr_done") and _resumable_url(page.url):
+            job["progress_url"] = page.url
+    return hook
+
+async def process_job(page, job, log=print, ledger_path=None):
+    """작업 하나 처리. 이어하기 주소가 있으면 먼저 시도하고, 실패하면 새로 업로드."""
+    on_phase = _ledger_hook(job, ledger_path)
+    if job["resume_url"]:
+        try:
+            log(f"[*] {job['base']} : 이전 진행분 이어하기 → {job['resume_url']}")
+            await open_resume_page(page, job["resume_url"])
+            await finish_one_set(page, job["base"], log=log, on_phase=on_phase,
+                                 ocr_timeout_ms=job["ocr_timeout_ms"])
+            return
+        except Exception as e:
+            log(f"[!] {job['base']} : 이어하기 실패({e}) → 처음부터 업로드")
+            job["resume_url"] = None
+    await process_one_set(page, job["base"], job["problem"], job["answer"], job["categories"],
+                          log=log, on_phase=on_phase, ocr_timeout_ms=job["ocr_timeout_ms"])
+
+async def start_pw_trace(context):
+    """선택한 세트 하나만 Playwright 트레이스(스크린샷/DOM 스냅샷) 기록 시작."""
+    await context.tracing.start(screenshots=True, snapshots=True)
+    return True
+
+async def stop_pw_trace(context, base):
+    path = f"pwtrace_{re.sub(r'[^0-9A-Za-z가-힣_-]+', '_', base)}.zip"
+    await context.tracing.stop(path=path)
+    print(f"[*] Playwright 트레이스 저장: {path} (npx playwright show-trace {path})")
+
+# ===================== 재시도/격리 =====================
+def new_run_report():
+    return {"done": [], "retries": {}, "quarantined": []}
+
+def retry_backoff_sec(attempt):
+    """attempt번째 실패 뒤 다시 시도하기까지 대기(지수 증가, 상한 RETRY_BACKOFF_MAX_SEC)."""
+    return min(RETRY_BACKOFF_MAX_SEC, RETRY_BACKOFF_SEC * 2 ** (attempt - 1))
+
+def record_failure(report, job, err, log=print) -> bool:
+    """
+    실패한 세트 기록. 다시 시도하면 True(job["retry_at"]까지 대기),
+    RETRY_ATTEMPTS번 모두 실패했으면 격리 목록(QUARANTINE_PATH)에 남기고 False.
+    제출(submitted) 이후에 실패했으면 다음 시도는 그 문서에서 이어 하고, 이어하기가 안 되면 process_job이 처음부터 올린다.
+    """
+    job["attempts"] = job.get("attempts", 0) + 1
+    job["resume_url"] = job.pop("progress_url", None)
+    err = f"{err.__class__.__name__}: {err}".splitlines()[0]
+    if job["attempts"] < RETRY_ATTEMPTS:
+        wait = retry_backoff_sec(job["attempts"])
+        job["retry_at"] = time.time() + wait
+        report["retries"][job["id"]] = job["attempts"]
+        log(f"[!] {job['base']} : 실패({err}) → {wait:.0f}초 뒤 새 페이지에서 재시도 "
+            f"({job['attempts'] + 1}/{RETRY_ATTEMPTS})")
+        emit({"type": "set", "state": "retry", "set": job["base"], "attempt": job["attempts"], "error": err})
+        return True
+    rec = {"ts": datetime.now().isoformat(timespec="seconds"), "folder": job["folder"], "base": job["base"],
+           "problem": str(job["problem"]), "answer": str(job["answer"]), "attempts": job["attempts"],
+           "error": err}
+    with open(QUARANTINE_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    report["quarantined"].append(rec)
+    log(f"[✗] {job['base']} : {job['attempts']}회 모두 실패 → 격리({QUARANTINE_PATH})하고 다음 세트로")
+    emit({"type": "set", "state": "quarantined", "set": job["base"], "attempt": job["attempts"], "error": err})
+    return False
+
+async def recycle_page(page):
+    """실패한 페이지는 닫고 같은 컨텍스트(같은 세션)에서 새 페이지를 연다."""
+    context, session = page.context, _PAGE_SESSION.pop(page, None)
+    try:
+        await page.close()
+    except Exception:
+        pass
+    _PAGE_STATE.pop(page, None)
+    _OCR_WATCHERS.pop(page, None)
+    new = await context.new_page()
+    if session is not None:
+        _PAGE_SESSION[new] = session
+        new.on("close", lambda _: _PAGE_SESSION.pop(new, None))
+    return new
+
+def job_label(job_id):
+    """작업 id("폴더/세트")를 보고서용 "폴더명/세트"로."""
+    path = Path(job_id)
+    return f"{path.parent.name}/{path.name}"
+
+def print_run_report(report):
+    """report: {"done": [작업 id], "retries": {작업 id: 횟수}, "quarantined": [격리 기록]}."""
+    retried_ok = [j for j in report["done"] if j in report["retries"]]
+    print(f"\n▼ 실행 결과: 성공 {len(report['done'])}세트(재시도 후 성공 {len(retried_ok)}), "
+          f"재시도 {sum(report['retries'].values())}회, 격리 {len(report['quarantined'])}세트")
+    for job_id, n in report["retries"].items():
+        print(f"  - 재시도: {job_label(job_id)} ×{n}")
+    for rec in report["quarantined"]:
+        print(f"  * 격리: {Path(rec['folder']).name}/{rec['base']} -> {rec['error']}")
+    if report["quarantined"]:
+        print(f"  (격리 목록: {QUARANTINE_PATH} — 파일을 확인한 뒤 다시 실행하면 다시 시도합니다)")
+    emit({"type": "run", "state": "report", "done": len(report["done"]),
+          "retries": sum(report["retries"].values()), "quarantined": len(report["quarantined"])})
+
+# ===================== 작업 API(비동기 코어) =====================
+class UploadJob:
+    """
+    AsyncUploader에 넣은 세트 하나의 핸들. await job(또는 job.result())으로 결과("done" / "quarantined")를
+    기다리고, async for ev in job.events()로 이 세트의 이벤트(emit과 같은 dict)를 받고, job.cancel()로 취소한다.
+    """
+
+    def __init__(self, job, index, total):
+        self.job, self.index, self.total = job, index, total
+        self.id, self.base = job["id"], job["base"]
+        self.task = None
+        self._queues = []
+
+    def __await__(self):
+        return self.task.__await__()
+
+    async def result(self):
+        return await self.task
+
+    def done(self):
+        return self.task.done()
+
+    def cancel(self):
+        """진행 중인 단계에서 멈춘다(페이지는 다음 세트가 새로 연다). await하면 CancelledError."""
+        return self.task.cancel()
+
+    async def events(self):
+        """세트가 끝날 때까지 이 세트의 이벤트를 차례로 내보낸다."""
+        if self.task.done():
+            return
+        q = asyncio.Queue()
+        self._queues.append(q)
+        try:
+            while True:
+                ev = await q.get()
+                if ev is None:
+                    return
+                yield ev
+        finally:
+            self._queues.remove(q)
+
+    def _push(self, ev):
+        for q in self._queues:
+            q.put_nowait(ev)
+
+class AsyncUploader:
+    """
+    이벤트 루프 하나로 여러 페이지를 돌리는 업로드 코어. 브라우저와 계정 세션(SessionPool)은 한 번만 띄우고,
+    넣은 세트는 빈 페이지(최대 concurrency개)가 생기는 대로 각자의 태스크로 처리한다. 한 페이지가 OCR을
+    기다리는 동안 다른 페이지는 다음 세트를 진행한다. 실패한 세트는 페이지를 새로 연 뒤 백오프만큼 기다렸다가
+    다시 시도하고(그동안 페이지는 다른 세트가 쓴다), 결과는 report(new_run_report)에 모인다.
+
+        async with AsyncUploader(concurrency=2) as up:
+            job = await up.submit("2025_10_A_문제.pdf", "2025_10_A_해설.pdf", ["기출문제", "고3", "수학"])
+            async for ev in job.events():
+                ...
+            await job
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, ent_id=None, ent_pw=None, headless=HEADLESS, lean=LEAN,
+                 capture=False, ledger_path=None, trace_set=None):
+        self.concurrency = max(1, concurrency)
+        self.ent_id, self.ent_pw = ent_id, ent_pw
+        self.headless, self.lean, self.capture = headless, lean, capture
+        self.ledger_path, self.trace_set = ledger_path, trace_set
+        self.show_folder = False
+        self.report = new_run_report()
+        self.timings = {}  # 시작 단계별 초(driver_start, browser_launch, session_page)
+        self.workers = {}  # 워커 번호 → {"done": [...], "busy_sec": 초} (run_jobs마다 새로)
+        self.pw = self.pool = self.loop = None
+        self._idle = asyncio.Queue()  # 쉬고 있는 (워커 번호, 페이지)
+        self._opened = 0  # 열어 둔 워커 페이지 수(concurrency를 줄이면 남는 페이지를 닫으며 줄어든다)
+        self._warm = None  # start()가 미리 열어 둔 첫 페이지
+        self._handles = {}  # 작업 id → UploadJob(이벤트 전달용)
+        self._submitted = 0
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        드라이버와 브라우저를 띄우고 첫 계정의 페이지를 미리 연다: 세션이 유효하면 문제 생성 페이지,
+        만료됐으면 로그인 화면까지(로그인은 첫 세트 때). 이미 떠 있으면 그대로 둔다.
+        """
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            add_event_listener(self._on_event)
+        await self.driver()
+        if self.pool is None:
+            t = time.perf_counter()
+            self.pool = await SessionPool.launch(self.pw, load_accounts(self.ent_id, self.ent_pw),
+                                                 self.headless, self.lean, self.capture)
+            self.timings["browser_launch"] = time.perf_counter() - t
+            t = time.perf_counter()
+            self._warm = await self.pool.for_worker(0).warm_page()
+            self.timings["session_page"] = time.perf_counter() - t
+        return self
+
+    async def driver(self):
+        """Playwright 드라이버(브라우저 없이). 카테고리 API/API 엔진도 이 드라이버 하나를 같이 쓴다."""
+        if self.pw is None:
+            from playwright.async_api import async_playwright
+            t = time.perf_counter()
+            self.pw = await async_playwright().start()
+            self.timings["driver_start"] = time.perf_counter() - t
+        return self.pw
+
+    async def configure(self, concurrency=CONCURRENCY, ent_id=None, ent_pw=None, headless=HEADLESS, lean=LEAN,
+                        capture=False, trace_set=None):
+        """
+        실행마다 설정을 맞춘다. 브라우저 설정(headless/lean/capture)이 달라졌거나 브라우저가 닫혔으면
+        새로 띄우고, 아이디/비밀번호를 주면 기본 계정(ACCOUNTS_PATH가 없을 때)의 로그인에 쓴다.
+        """
+        self.concurrency, self.trace_set = max(1, concurrency), trace_set
+        self.ent_id, self.ent_pw = ent_id or self.ent_id, ent_pw or self.ent_pw
+        if self.pool is not None and ((self.headless, self.lean, self.capture) != (headless, lean, capture)
+                                      or not self.pool.browser.is_connected()):
+            await self._close_pool()
+        self.headless, self.lean, self.capture = headless, lean, capture
+        await self.start()
+        for _ in range(self._idle.qsize()):  # 동시 작업 수를 줄였으면 남는 워커 페이지를 닫는다
+            await self._release(*self._idle.get_nowait())
+        if not os.path.exists(ACCOUNTS_PATH):
+            session = self.pool.for_worker(0)
+            session.user, session.pw = self.ent_id or session.user, self.ent_pw or session.pw
+        return self
+
+    async def ready(self):
+        """첫 페이지를 로그인까지 마친 문제 생성 페이지로 준비(사전 점검과 겹치도록 일찍 호출)."""
+        async with self.page():
+            pass
+
+    @asynccontextmanager
+    async def page(self):
+        """쉬고 있는 페이지 하나를 빌린다(카테고리 확인, 세션 확인 등). 끝나면 작업용으로 돌려준다."""
+        wid, page = await self._acquire()
+        try:
+            yield page
+        finally:
+            await self._release(wid, page)
+
+    async def _acquire(self):
+        """쉬고 있는 워커 페이지를 꺼냄. 없는데 concurrency보다 적게 열었으면 새로 연다."""
+        if self._idle.empty() and self._opened < self.concurrency:
+            self._opened += 1
+            wid, page = self._opened, None
+        else:
+            wid, page = await self._idle.get()
+        try:
+            if page is None or page.is_closed():
+                page = await self._open_page(wid)
+        except BaseException:
+            self._idle.put_nowait((wid, None))  # 자리는 돌려주고, 다음 요청이 새로 연다
+            raise
+        return wid, page
+
+    async def _release(self, wid, page):
+        """빌린 페이지를 돌려준다. concurrency를 넘는 워커 번호의 페이지는 닫고 자리를 줄인다."""
+        if wid <= self.concurrency:
+            self._idle.put_nowait((wid, page))
+            return
+        self._opened -= 1
+        if page is not None:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def _open_page(self, wid):
+        session = self.pool.for_worker(wid - 1)
+        if wid == 1 and self._warm is not None and not self._warm.is_closed():
+            page, self._warm = self._warm, None
+            print("[*] 미리 띄워 둔 브라우저 세션을 이어받습니다.")
+            await try_login_if_needed(page, session.user, session.pw)
+            await reach_create_page(page, None, None)
+            return page
+        return await session.new_page()
+
+    async def _close_pool(self):
+        await self.pool.close()
+        self.pool, self._warm, self._opened, self._idle = None, None, 0, asyncio.Queue()
+
+    async def close(self):
+        """세션 파일을 저장하고 브라우저와 드라이버를 닫는다."""
+        remove_event_listener(self._on_event)
+        if self.pool is not None:
+            await self._close_pool()
+        if self.pw is not None:
+            await self.pw.stop()
+            self.pw = None
+        self.loop = None
+
+    def _on_event(self, ev):
+        """emit 리스너: 세트 이벤트를 그 세트의 UploadJob으로(다른 스레드에서 온 이벤트는 루프로 넘김)."""
+        handle = self._handles.get(ev.get("job"))
+        if handle is None or self.loop is None:
+            return
+        try:
+            here = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            here = False
+        if here:
+            handle._push(ev)
+        else:
+            self.loop.call_soon_threadsafe(handle._push, ev)
+
+    async def submit(self, problem, answer, categories, base=None, folder=None, force=False):
+        """
+        문제/해설 파일 한 쌍을 사전 점검한 뒤 작업으로 넣고 UploadJob을 반환.
+        base(세트 이름)는 생략하면 파일명에서, folder(기록용)는 문제 파일의 폴더.
+        점검에 걸리면 ValueError, 같은 내용으로 이미 저장된 쌍이면(force가 아니면) None.
+        """
+        problem, answer = Path(problem), Path(answer)
+        if base is None:
+            parsed = parse_pair_name(problem.name)
+            base = problem.stem if isinstance(parsed, str) else parsed[0]
+        check = await asyncio.to_thread(inspect_pair, problem, answer)
+        if check["errors"]:
+            raise ValueError(f"{base} 제외 -> {'; '.join(check['errors'])}")
+        jobs = plan_jobs([(base, problem, answer)], Path(folder) if folder else problem.parent, categories,
+                         force=force, ledger_path=self.ledger_path, checks={(problem, answer): check})
+        return self.submit_job(jobs[0]) if jobs else None
+
+    def submit_job(self, job, index=None, total=None):
+        """plan_jobs가 만든 작업 하나를 넣고 UploadJob 반환. index/total은 진행 표시용."""
+        self._submitted += 1
+        handle = UploadJob(job, index or self._submitted, total or self._submitted)
+        self._handles[job["id"]] = handle
+        handle.task = asyncio.create_task(self._process(handle))
+        handle.task.add_done_callback(lambda _: self._forget(handle))
+        return handle
+
+    def _forget(self, handle):
+        if self._handles.get(handle.id) is handle:
+            del self._handles[handle.id]
+        handle._push(None)
+
+    async def run_jobs(self, jobs, show_folder=False):
+        """작업 목록 전체를 넣고 모두 끝날 때까지 기다린다. 세트 밖의 오류(세션/브라우저)면 나머지를 취소."""
+        total = len(jobs)
+        self.show_folder, self.workers = show_folder, {}
+        if self.concurrency > 1 and total > 1:
+            print(f"▶ 워커 {min(self.concurrency, total)}개로 동시 업로드")
+        tasks = [self.submit_job(job, i, total).task for i, job in enumerate(jobs, 1)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if self.concurrency > 1 and total > 1:
+                self.print_worker_stats()
+
+    def print_worker_stats(self):
+        print("\n▼ 워커별 결과")
+        for wid, st in sorted(self.workers.items()):
+            print(f"  - 워커 {wid}: {len(st['done'])}세트, 작업 시간 {st['busy_sec']:.0f}초")
+
+    async def _process(self, handle):
+        """세트 하나를 끝까지(재시도 포함). 시도마다 페이지를 빌렸다가 돌려준다."""
+        job, i, total, base = handle.job, handle.index, handle.total, handle.base
+        _JOB.set(handle.id)  # 작업마다 태스크가 따로라 이 세트의 이벤트에만 붙는다
+        buffered = self.concurrency > 1  # 여러 세트 로그가 섞이지 않도록 세트마다 모아서 출력
+        while True:
+            if job.get("retry_at"):
+                await asyncio.sleep(max(0.0, job["retry_at"] - time.time()))
+            wid = page = stats = None
+            lines, since, tracing = [], time.time(), False
+            _ATTEMPT.set(job.get("attempts", 0) + 1)
+            log = lines.append if buffered else print
+            try:
+                # 페이지 열기(이동/로그인 확인) 실패도 이 세트의 실패 1회로 센다 → 다른 세트는 계속
+                wid, page = await self._acquire()
+                stats = self.workers.setdefault(wid, {"done": [], "busy_sec": 0.0})
+                if buffered:
+                    print(f"[워커 {wid}] [{i}/{total}] {base} 업로드 시작 ({' > '.join(job['categories'])})")
+                else:
+                    print(f"\n=== [{i}/{total}] {base} 업로드 시작 ===")
+                if self.show_folder:
+                    log(f"[*] 폴더: {job['folder']}")
+                set_trace_set(base)
+                emit({"type": "set", "state": "start", "set": base, "index": i, "total": total, "worker": wid})
+                if base == self.trace_set:
+                    tracing = await start_pw_trace(page.context)
+                session = _PAGE_SESSION.get(page)
+                if session is not None:
+                    await session.refresh_if_needed(page)
+                await process_job(page, job, log=log, ledger_path=self.ledger_path)
+                if session is not None:
+                    await session.save()  # 세트마다 세션 파일 갱신
+            except asyncio.CancelledError:
+                log(f"[*] {base} : 취소됨")
+                emit({"type": "set", "state": "cancelled", "set": base, "index": i, "total": total, "worker": wid})
+                if page is not None:
+                    mark_page(page, "dirty")
+                raise
+            except Exception as e:
+                emit({"type": "set", "state": "failed", "set": base, "index": i, "total": total, "worker": wid,
+                      "error": str(e)})
+                retry = record_failure(self.report, job, e, log=log)
+                if page is not None:
+                    try:
+                        page = await recycle_page(page)
+                    except Exception:
+                        pass  # 닫힌 페이지로 돌려주면 다음 _acquire가 새로 연다
+                if retry:
+                    continue
+                return "quarantined"
+            finally:
+                if tracing:
+                    await stop_pw_trace(page.context, base)
+                if stats is not None:
+                    stats["busy_sec"] += time.time() - since
+                if buffered and lines:
+                    print(f"\n=== [{i}/{total}] {base}" + (f" (워커 {wid}) ===" if wid else " (페이지 열기 실패) ==="))
+                    for line in lines:
+                        print(line)
+                if wid is not None:
+                    await self._release(wid, page)
+            stats["done"].append(base)
+            self.report["done"].append(job["id"])
+            emit({"type": "set", "state": "done", "set": base, "index": i, "total": total, "worker": wid})
+            return "done"
+
+# ===================== API 엔진(브라우저 없이 직접 호출) =====================
+async def run_api_jobs(pw, jobs, ledger_path=None):
+    """API 엔진으로 처리하고, 처리하지 못한 작업 목록을 반환(→ 브라우저 엔진이 이어받음)."""
+    try:
+        eps = api_engine.load_endpoints()
+    except Exception as e:
+        print(f"[!] API 엔드포인트 정의 오류({e}) → 브라우저 엔진으로 진행")
+        return jobs
+    if eps is None:
+        print(f"[!] {api_engine.ENDPOINTS_PATH}가 없어 브라우저 엔진으로 진행 (--capture로 먼저 호출을 기록하세요)")
+        return jobs
+
+    api = await api_engine.ApiUploader.open(pw, eps, STORAGE_PATH)
+    left, fails = [], 0
+    try:
+        for i, job in enumerate(jobs, 1):
+            if fails >= API_MAX_FAILS:
+                left.append(job); continue
+            print(f"\n=== [{i}/{len(jobs)}] {job['base']} 업로드 시작 (API) ===")
+            token = _JOB.set(job["id"])
+            emit({"type": "set", "state": "start", "set": job["base"], "index": i, "total": len(jobs)})
+            last_url = []
+
+            def on_phase(phase, url, job=job):
+                last_url[:] = [url]
+                ledger_append(job, phase, url=url, path=ledger_path)
+
+            try:
+                with phase("api_upload", job["base"]):
+                    await api.upload(job["base"], job["problem"], job["answer"], job["categories"],
+                                     ocr_timeout_ms=job["ocr_timeout_ms"], on_phase=on_phase)
+                fails = 0
+                emit({"type": "set", "state": "done", "set": job["base"], "index": i, "total": len(jobs)})
+            except Exception as e:
+                fails += 1
+                emit({"type": "set", "state": "failed", "set": job["base"], "index": i, "total": len(jobs),
+                      "error": str(e)})
+                print(f"[!] {job['base']} : API 업로드 실패({e}) → 브라우저 엔진으로 넘김")
+                if last_url:
+                    job["resume_url"] = last_url[0]
+                left.append(job)
+            finally:
+                _JOB.reset(token)  # 호출한 쪽(run_async)의 이후 이벤트에 남지 않도록
+    finally:
+        await api.close()
+    if fails >= API_MAX_FAILS:
+        print(f"[!] API 엔진이 연속 {API_MAX_FAILS}회 실패 → 남은 세트는 브라우저 엔진으로 진행")
+    return left
+
+async def run_async(folder: Path, ent_id=None, ent_pw=None, log_queue=None, concurrency=CONCURRENCY, force=False,
+                    recursive=False, engine=ENGINE, capture=False, headless=HEADLESS, lean=LEAN, trace_set=None,
+                    refresh_categories=False, uploader=None):
+    """
+    folder 하나를 업로드. recursive=True면 folder를 루트로 보고 하위 카테고리 폴더 전체를
+    한 번의 브라우저/로그인 세션으로 업로드한다.
+    engine="api"면 API 엔진을 먼저 쓰고, capture=True면 브라우저 엔진의 네트워크 호출을 기록한다.
+    headless/lean: 창 없이 실행 / 불필요한 리소스 차단.
+    단계별 시간은 TRACE_PATH에 기록되고, trace_set으로 지정한 세트는 Playwright 트레이스도 남긴다.
+    업로드 전에 모든 폴더의 카테고리 경로를 카탈로그(CATEGORY_CACHE_PATH)와 대조하고,
+    파일은 사전 점검(Preflight)을 통과한 쌍만 올린다.
+    uploader: 미리 띄워 둔 AsyncUploader(GUI 등). 주면 그 브라우저/페이지를 이어받고 실행 후에도 닫지 않는다.
+    """
+    start_trace()
+    groups = scan_groups(folder, recursive)
+    with Preflight(groups) as preflight:  # 파일 검사는 브라우저 시작/로그인과 동시에
+        jobs = None
+        if not _may_need_upload(groups, force):  # 이름상 모두 저장됨 → 내용까지 확인한 뒤에 브라우저를 띄움
+            jobs = _plan_scanned(groups, folder, recursive, force, await asyncio.to_thread(preflight.results))
+            if not jobs:
+                print("\n[✓] 새로 올릴 세트가 없습니다. (다시 올리려면 --force)")
+                return
+
+        up = uploader or AsyncUploader()
+        try:
+            paths = sorted({tuple(cats) for _, cats, _ in groups})
+            catalog, missing = await prepare_catalog(paths, await up.driver(), refresh=refresh_categories)
+            settings = (concurrency, ent_id, ent_pw, headless, lean, capture, trace_set)
+            if missing or engine != "api":
+                await up.configure(*settings)
+                await up.ready()
+            if missing:  # 캐시/API로 확인 못 한 경로는 로그인 후 화면에서 확인
+                async with up.page() as page:
+                    await scrape_category_paths(page, missing, catalog)
+            if jobs is None:
+                jobs = _plan_scanned(groups, folder, recursive, force, await asyncio.to_thread(preflight.results))
+            if not jobs:
+                print("\n[✓] 새로 올릴 세트가 없습니다. (다시 올리려면 --force)")
+                return
+            check_category_paths(jobs, catalog)
 
-    with sync_playwright() as p:
-        browser, context = get_browser_and_context(p)
-        page = context.new_page()
+            report = up.report = new_run_report()
+            if engine == "api":
+                left = await run_api_jobs(await up.driver(), jobs)
+                report["done"] += [j["id"] for j in jobs if j not in left]
+                jobs = left
+                if not jobs:
+                    print_run_report(report)
+                    print("\n[✓] 모든 세트 업로드 및 저장 완료.")
+                    print_trace_summary()
+                    return
 
-        page.goto(UPLOAD_URL, wait_until="load")
-        page.wait_for_load_state("networkidle")
-        try_login_if_needed(page, ent_id, ent_pw)
-        reach_create_page(page, ent_id, ent_pw)
+            await up.configure(*settings)
+            try:
+                await up.run_jobs(jobs, show_folder=recursive)
+            finally:
+                await up.pool.save_all()  # 중간에 멈춰도 세션은 남긴다
+                print_run_report(report)
+                report_run_stats()
+                report_selector_stats()
+                print_trace_summary()
+            if not report["quarantined"]:
+                print("\n[✓] 모든 세트 업로드 및 저장 완료.")
+        finally:
+            if uploader is None:
+                await up.close()
 
-        for i, (base, prob, ans) in enumerate(pairs, 1):
-            print(f"\n=== [{i}/{len(pairs)}] {base} 업로드 시작 ===")
-            process_one_set(page, base, prob, ans, derived_categories)
-            
-            page.goto(UPLOAD_URL, wait_until="load")
-            page.wait_for_load_state("networkidle")
+def run(folder: Path, ent_id=None, ent_pw=None, log_queue=None, concurrency=CONCURRENCY, force=False,
+        recursive=False, engine=ENGINE, capture=False, headless=HEADLESS, lean=LEAN, trace_set=None,
+        refresh_categories=False):
+    """run_async()를 새 이벤트 루프로 실행(명령줄/벤치마크용)."""
+    asyncio.run(run_async(folder, ent_id, ent_pw, log_queue, concurrency, force, recursive, engine, capture,
+                          headless, lean, trace_set, refresh_categories))
 
-        context.storage_state(path=STORAGE_PATH)
-        print("\n[✓] 모든 세트 업로드 및 저장 완료.")
+def clean_path(raw: str) -> Path:
+    """붙여넣은 경로의 따옴표/끝 슬래시 정리."""
+    return Path(raw.strip().strip('"').strip("'").rstrip("\\/")).expanduser().resolve()
 
 if __name__ == "__main__":
-    if len(sys.argv) >= 2:
-        arg = sys.argv[1].strip().strip('"').strip("'").rstrip("\\/")
-        folder = Path(arg).expanduser().resolve()
+    ap = argparse.ArgumentParser(description="GENITEACHER 문제/해설 세트 업로더")
+    ap.add_argument("folder", nargs="?", help="업로드할 폴더 경로(생략 시 입력 받음)")
+    ap.add_argument("-j", "--concurrency", type=int, default=CONCURRENCY,
+                    help=f"동시에 처리할 세트 수 (기본 {CONCURRENCY})")
+    ap.add_argument("-r", "--recursive", action="store_true",
+                    help="폴더를 루트로 보고 하위의 카테고리 폴더 전체를 한 번에 업로드")
+    ap.add_argument("--engine", choices=["browser", "api"], default=ENGINE,
+                    help="api: 화면 없이 API 직접 호출(실패 시 브라우저로 대체)")
+    ap.add_argument("--capture", action="store_true",
+                    help=f"브라우저 엔진의 XHR/fetch 호출을 {api_engine.CAPTURE_PATH}에 기록")
+    ap.add_argument("--headless", action="store_true", help="브라우저 창 없이 실행")
+    ap.add_argument("--lean", action="store_true",
+                    help="가벼운 모드: 이미지/폰트/미디어·외부 호스트 요청 차단")
+    ap.add_argument("--trace-set", metavar="BASE",
+                    help="지정한 세트(예: 2025_07_수학A)만 Playwright 트레이스(zip) 기록")
+    ap.add_argument("--refresh-categories", action="store_true",
+                    help=f"{CATEGORY_CACHE_PATH} 캐시를 무시하고 카테고리 목록을 다시 확인")
+    ap.add_argument("--force", action="store_true",
+                    help=f"{LEDGER_PATH} 기록을 무시하고 모든 세트를 다시 업로드")
+    args = ap.parse_args()
+    if args.folder:
+        folder = clean_path(args.folder)
     else:
-        raw = input("업로드할 폴더 경로를 붙여넣고 엔터: ")
-        folder = Path(raw.strip().strip('"').strip("'").rstrip("\\/")).expanduser().resolve()
-    run(folder)
\ No newline at end of file
+        folder = clean_path(input("업로드할 폴더 경로를 붙여넣고 엔터: "))
+    run(folder, concurrency=max(1, args.concurrency), force=args.force, recursive=args.recursive,
+        engine=args.engine, capture=args.capture, headless=args.headless, lean=args.lean,
+        trace_set=args.trace_set, refresh_categories=args.refresh_categories)